@@ -0,0 +1,163 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import comment_thread, reply_resource, video_resource
+
+API_PREFIX = "/youtube/v3/"
+
+
+class FakeApiConfig:
+
+    def __init__(self, comments_per_video: int = 1000, replies_per_thread: int = 0,
+                 latency: float = 0.0, error_rate: float = 0.0, error_reason: str = "rateLimitExceeded",
+                 exhausted_keys=(), seed: int = 0):
+        self.comments_per_video = comments_per_video
+        self.replies_per_thread = replies_per_thread
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_reason = error_reason
+        self.exhausted_keys = set(exhausted_keys)
+        self.rng = random.Random(seed)
+
+
+class FakeYoutubeHandler(BaseHTTPRequestHandler):
+
+    server_version = "FakeYoutube/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeApiConfig:
+        return self.server.config
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, reason: str) -> None:
+        self._send_json(status, {
+            "error": {
+                "code": status,
+                "message": reason,
+                "errors": [{"reason": reason, "domain": "youtube.quota", "message": reason}],
+            }
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        resource = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else None
+
+        with self.server.lock:
+            self.server.requests[resource] = self.server.requests.get(resource, 0) + 1
+            inject_error = resource == "commentThreads" and self.config.rng.random() < self.config.error_rate
+
+        if self.config.latency:
+            time.sleep(self.config.latency)
+
+        if params.get("key") in self.config.exhausted_keys:
+            return self._send_error(403, "quotaExceeded")
+        if inject_error:
+            return self._send_error(403, self.config.error_reason)
+
+        if resource == "videos":
+            return self._send_json(200, self._videos(params))
+        if resource == "commentThreads":
+            return self._send_json(200, self._comment_threads(params))
+        if resource == "comments":
+            return self._send_json(200, self._comments(params))
+        return self._send_error(404, "notFound")
+
+    def _videos(self, params: Dict) -> Dict:
+        ids = [video_id for video_id in params.get("id", "").split(",") if video_id]
+        return {
+            "kind": "youtube#videoListResponse",
+            "items": [video_resource(video_id, self.config.comments_per_video) for video_id in ids],
+        }
+
+    def _page(self, params: Dict, total: int):
+        page_size = int(params.get("maxResults", 20))
+        start = int(params.get("pageToken") or 0)
+        end = min(total, start + page_size)
+        next_token = str(end) if end < total else None
+        return start, end, next_token
+
+    def _comment_threads(self, params: Dict) -> Dict:
+        video_id = params.get("videoId", "")
+        start, end, next_token = self._page(params, self.config.comments_per_video)
+        response = {
+            "kind": "youtube#commentThreadListResponse",
+            "items": [
+                comment_thread(video_id, index, self.config.replies_per_thread)
+                for index in range(start, end)
+            ],
+        }
+        if next_token:
+            response["nextPageToken"] = next_token
+        return response
+
+    def _comments(self, params: Dict) -> Dict:
+        parent_id = params.get("parentId", "")
+        start, end, next_token = self._page(params, self.config.replies_per_thread)
+        response = {
+            "kind": "youtube#commentListResponse",
+            "items": [reply_resource(parent_id, index) for index in range(start, end)],
+        }
+        if next_token:
+            response["nextPageToken"] = next_token
+        return response
+
+
+class FakeYoutubeServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[FakeApiConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeYoutubeHandler)
+        self.config = config or FakeApiConfig()
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakeYoutubeServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-youtube", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor local que imita a YouTube Data API v3")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--comments", type=int, default=1000, help="comentários por vídeo")
+    parser.add_argument("--replies", type=int, default=0, help="respostas por comentário")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência por requisição em segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de páginas com erro 403")
+    args = parser.parse_args()
+
+    server = FakeYoutubeServer(
+        FakeApiConfig(args.comments, args.replies, args.latency, args.error_rate),
+        port=args.port,
+    )
+    print(f"API falsa em {server.root_url} (API_ROOT_URL)")
+    server.serve_forever()
@@ -0,0 +1,95 @@
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from utils.data_processing import PUNCTUATION_PATTERN, SPAM_PATTERN, flag_comments
+
+from .synthetic import comment_text
+
+# (nome, total de textos, fração de textos distintos; None usa a distribuição do servidor falso)
+SCENARIOS = [
+    ("unicos", 200_000, 1.0),
+    ("metade_unicos", 1_000_000, 0.5),
+    ("sintetico", 1_000_000, None),
+]
+
+
+def reference_flag_comment(text: str) -> List[str]:
+    # flag_comment sem o filtro de trechos: a regex de spam roda em todo texto com palavras
+    if not text or not text.strip():
+        return ["empty"]
+    clean = PUNCTUATION_PATTERN.sub("", text).strip()
+    if not clean:
+        return ["emoji_only"]
+    words = clean.split()
+    if len(words) == 1 and words[0].isdigit():
+        return ["spam"]
+    if SPAM_PATTERN.search(text):
+        return ["spam"]
+    if len(words) <= 2:
+        return ["low_quality"]
+    if len(words) >= 15:
+        return ["narrative"]
+    return []
+
+
+def reference(texts: List[str]) -> List[List[str]]:
+    return [reference_flag_comment(text) for text in texts]
+
+
+def scenario_texts(total: int, unique_ratio, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    if unique_ratio is None:
+        return [comment_text(rng) for _ in range(total)]
+
+    distinct = [f"{comment_text(rng)} {n}" for n in range(max(1, int(total * unique_ratio)))]
+    texts = distinct + [rng.choice(distinct) for _ in range(total - len(distinct))]
+    rng.shuffle(texts)
+    return texts
+
+
+def best_times(funcs: Dict[str, Callable], texts: List[str], repeat: int) -> Dict[str, float]:
+    # Repetições alternadas: ruído da máquina afeta as duas versões por igual
+    best = {name: float("inf") for name in funcs}
+    for _ in range(repeat):
+        for name, func in funcs.items():
+            started = time.perf_counter()
+            func(texts)
+            best[name] = min(best[name], time.perf_counter() - started)
+    return best
+
+
+def run(repeat: int, scale: float) -> List[Dict]:
+    results = []
+    print(f"{'cenário':<16}{'textos':>10}{'distintos':>11}{'regex (s)':>11}{'lote (s)':>10}{'ganho':>8}")
+    for name, total, unique_ratio in SCENARIOS:
+        texts = scenario_texts(int(total * scale), unique_ratio)
+        if flag_comments(texts) != reference(texts):
+            raise AssertionError(f"{name}: flag_comments diverge da referência")
+
+        times = best_times({"reference": reference, "batch": flag_comments}, texts, repeat)
+        print(
+            f"{name:<16}{len(texts):>10}{len(set(texts)):>11}{times['reference']:>11.2f}{times['batch']:>10.2f}"
+            f"{times['reference'] / times['batch']:>7.2f}x"
+        )
+        results.append({"scenario": name, **times})
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compara flag_comments com o laço que roda a regex de spam em todo texto")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por cenário (vale a menor)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica o número de textos")
+    args = parser.parse_args()
+
+    slower = [r["scenario"] for r in run(args.repeat, args.scale) if r["batch"] >= r["reference"]]
+    if slower:
+        print(f"\nflag_comments não é mais rápido que a referência em: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+from .run_benchmarks import REPO_ROOT
+
+# Tempo máximo de importação (s), medido dentro do processo, sem a inicialização do interpretador
+BUDGETS = {
+    "utils": 0.05,
+    "cli": 0.05,
+    "utils.reprocess": 0.15,
+    "utils.stats_refresher": 0.15,
+    "utils.near_duplicates": 0.15,
+    "utils.search_index": 0.05,
+    "main": 0.25,
+}
+# Dependências pesadas que só podem ser carregadas pelo subcomando que as usa
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "googleapiclient.discovery",
+    "selenium.webdriver",
+    "youtube_transcript_api",
+)
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    # Menor tempo entre as repetições: descarta ruído de disco e de outros processos
+    return {"seconds": min(run["seconds"] for run in runs), "heavy": runs[0]["heavy"]}
+
+
+def check_budgets(repeat: int, scale: float) -> List[str]:
+    failures = []
+    print(f"{'módulo':<24}{'tempo (ms)':>12}{'limite (ms)':>13}  dependências pesadas")
+    for module, budget in BUDGETS.items():
+        result = measure(module, repeat)
+        limit = budget * scale
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(f"{module:<24}{result['seconds'] * 1000:>12.1f}{limit * 1000:>13.0f}  {heavy}")
+        if result["seconds"] > limit:
+            failures.append(f"{module}: {result['seconds'] * 1000:.0f} ms > {limit * 1000:.0f} ms")
+        if result["heavy"]:
+            failures.append(f"{module}: carrega {heavy} na importação")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verifica o tempo de importação dos pontos de entrada")
+    parser.add_argument("--repeat", type=int, default=5, help="repetições por módulo (vale a menor)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica os limites (máquinas lentas)")
+    args = parser.parse_args()
+
+    failures = check_budgets(args.repeat, args.scale)
+    if failures:
+        print("\nOrçamento de importação excedido:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nTodos os pontos de entrada dentro do orçamento")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
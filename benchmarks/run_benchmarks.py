@@ -0,0 +1,217 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from .fake_youtube_server import FakeApiConfig, FakeYoutubeServer
+
+SCENARIOS = {
+    "baseline": {"videos": 10, "comments": 1000},
+    "latency": {"videos": 20, "comments": 500, "latency": 0.05, "workers": 4},
+    "replies": {"videos": 5, "comments": 500, "replies": 30},
+    "rate_limited": {"videos": 5, "comments": 2000, "error_rate": 0.05},
+    "quota_rotation": {"videos": 5, "comments": 1000, "keys": 2, "exhausted_keys": ["bench-key-0"]},
+    "large": {"videos": 10, "comments": 100_000},
+}
+# Métrica -> True quando um valor maior é melhor
+COMPARED_METRICS = {
+    "videos_per_second": True,
+    "pages_per_second": True,
+    "save_seconds": False,
+    "peak_rss_mb": False,
+}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_env(scenario: Dict, root_url: str) -> Dict[str, str]:
+    keys = [f"bench-key-{n}" for n in range(scenario.get("keys", 1))]
+    return {
+        **os.environ,
+        "API_SERVICE_NAME": "youtube",
+        "API_VERSION": "v3",
+        "API_KEY_YOUTUBE": keys[0],
+        "API_KEYS_YOUTUBE": ",".join(keys),
+        "API_ROOT_URL": root_url,
+        "API_CACHE_ENABLED": "0",
+        "API_REQUESTS_PER_SECOND": "0",
+        "QUOTA_STATE_FILE": "",
+        "OUTPUT_FORMATS": scenario.get("formats", ""),
+        "EXPAND_REPLIES": "1",
+        "STREAMING_COMMENTS": "0",
+        "INCREMENTAL_COMMENTS": "0",
+        "SEEN_POLICY": "off",
+    }
+
+
+def run_child(name: str, result_file: str) -> None:
+    # Importado só no processo filho: as classes leem as variáveis de ambiente na importação
+    import main
+    from utils import METRICS
+    from utils.transcripts import STATUS_UNAVAILABLE, empty_transcript
+
+    from .synthetic import video_ids
+
+    scenario = SCENARIOS[name]
+    logging.getLogger("YoutubeCollector").addHandler(logging.NullHandler())
+    # O servidor falso não implementa transcrições
+    main.fetch_transcript = lambda video_id: empty_transcript(video_id, STATUS_UNAVAILABLE)
+
+    output_dir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    collection_folder = os.path.join(output_dir, "coleta_benchmark")
+    os.makedirs(collection_folder)
+    stats = {
+        "videos_coletados": 0,
+        "videos_com_erro": 0,
+        "total_comentarios": 0,
+        "total_respostas": 0,
+        "chamadas_respostas_extras": 0,
+        "videos_ja_vistos": 0,
+        "estatisticas_atualizadas": 0,
+    }
+    ctx = main.CollectionContext(collection_folder, scenario["videos"], stats)
+    videos = [
+        (index, video_id, f"https://www.youtube.com/shorts/{video_id}")
+        for index, video_id in enumerate(video_ids(scenario["videos"]))
+    ]
+
+    workers = scenario.get("workers", 1)
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if workers > 1:
+                main.process_videos_concurrently(videos, ctx, workers)
+            else:
+                main.process_videos(videos, ctx)
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    snapshot = METRICS.snapshot()
+    timings = snapshot["timings"]
+    counters = snapshot["counters"]
+    pages = timings.get("api.commentThreads.list", {}).get("count", 0)
+    result = {
+        "scenario": name,
+        "videos": stats["videos_coletados"],
+        "errors": stats["videos_com_erro"],
+        "comments": stats["total_comentarios"],
+        "replies": stats["total_respostas"],
+        "elapsed_seconds": elapsed,
+        "videos_per_second": stats["videos_coletados"] / elapsed if elapsed else 0.0,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "save_seconds": sum(t["total"] for stage, t in timings.items() if stage.startswith("save.")),
+        # ru_maxrss vem em KiB no Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "quota_units": counters.get("quota.units", 0),
+        "retries": counters.get("api.retries", 0),
+        "backoff_seconds": counters.get("api.backoff_seconds", 0),
+    }
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_scenario(name: str) -> Dict:
+    scenario = SCENARIOS[name]
+    config = FakeApiConfig(
+        comments_per_video=scenario["comments"],
+        replies_per_thread=scenario.get("replies", 0),
+        latency=scenario.get("latency", 0.0),
+        error_rate=scenario.get("error_rate", 0.0),
+        exhausted_keys=scenario.get("exhausted_keys", ()),
+    )
+    server = FakeYoutubeServer(config).start()
+    fd, result_file = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        # Processo separado: RSS de pico isolado e o servidor não disputa o GIL com a coleta
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run_benchmarks", "--child", name, "--result-file", result_file],
+            cwd=REPO_ROOT,
+            env=child_env(scenario, server.root_url),
+            check=True,
+        )
+        with open(result_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        server.stop()
+        os.remove(result_file)
+
+
+def print_report(results: List[Dict]) -> None:
+    header = f"{'cenário':<16}{'vídeos/s':>10}{'páginas/s':>11}{'save (s)':>10}{'RSS (MB)':>10}{'total (s)':>11}{'retries':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result['scenario']:<16}{result['videos_per_second']:>10.2f}{result['pages_per_second']:>11.1f}"
+            f"{result['save_seconds']:>10.2f}{result['peak_rss_mb']:>10.1f}{result['elapsed_seconds']:>11.2f}"
+            f"{result['retries']:>9g}"
+        )
+
+
+def find_regressions(results: List[Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["scenario"])
+        if not reference:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{result['scenario']}.{metric}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks da coleta contra uma API do YouTube local")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="cenário a executar (pode repetir; padrão: todos)")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="variação aceita antes de acusar regressão")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.result_file)
+        return 0
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        print(f"Executando cenário {name}...", flush=True)
+        results.append(run_scenario(name))
+
+    print()
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({result["scenario"]: result for result in results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressões de desempenho:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\nSem regressões em relação à linha de base")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import random
+from typing import Dict, List, Optional
+
+WORDS = (
+    "muito bom esse vídeo adorei conteúdo top demais parabéns canal incrível "
+    "quero mais disso alguém sabe o nome da música primeira vez aqui "
+    "isso é verdade não acredito que fiz isso ontem melhor short do dia"
+).split()
+EMOJIS = ["😂", "🔥", "❤️", "👏", "😍", "🤣"]
+SPAM_TEXTS = [
+    "Ganhe dinheiro fácil acesse http://exemplo.com/promo",
+    "Se inscreva no meu canal!!! confira meu canal",
+    "Clique aqui www.promo-exemplo.com",
+]
+
+
+def comment_text(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.70:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+    if kind < 0.82:
+        return "".join(rng.choice(EMOJIS) for _ in range(rng.randint(1, 6)))
+    if kind < 0.90:
+        return rng.choice("kh") * rng.randint(5, 15)
+    if kind < 0.97:
+        return rng.choice(SPAM_TEXTS)
+    return " "
+
+
+def comment_resource(comment_id: str, rng: random.Random, parent_id: Optional[str] = None) -> Dict:
+    text = comment_text(rng)
+    snippet = {
+        "authorDisplayName": f"@usuario{rng.randint(1, 50000)}",
+        "textDisplay": text,
+        "textOriginal": text,
+        "likeCount": rng.randint(0, 500),
+        "publishedAt": f"2026-0{rng.randint(1, 9)}-{rng.randint(10, 28)}T{rng.randint(10, 23)}:00:00Z",
+    }
+    if parent_id:
+        snippet["parentId"] = parent_id
+    return {"kind": "youtube#comment", "id": comment_id, "snippet": snippet}
+
+
+def comment_thread(video_id: str, index: int, replies: int = 0, included_replies: int = 5) -> Dict:
+    rng = random.Random(f"{video_id}:{index}")
+    thread_id = f"{video_id}.c{index}"
+    thread = {
+        "kind": "youtube#commentThread",
+        "id": thread_id,
+        "snippet": {
+            "videoId": video_id,
+            "topLevelComment": comment_resource(thread_id, rng),
+            "totalReplyCount": replies,
+        },
+    }
+    if replies:
+        thread["replies"] = {
+            "comments": [
+                reply_resource(thread_id, n) for n in range(min(replies, included_replies))
+            ]
+        }
+    return thread
+
+
+def reply_resource(parent_id: str, index: int) -> Dict:
+    rng = random.Random(f"{parent_id}:r{index}")
+    return comment_resource(f"{parent_id}.r{index}", rng, parent_id)
+
+
+def video_resource(video_id: str, comment_count: int) -> Dict:
+    rng = random.Random(video_id)
+    return {
+        "kind": "youtube#video",
+        "id": video_id,
+        "snippet": {
+            "title": f"Short sintético {video_id}",
+            "description": "Vídeo gerado para benchmark",
+            "publishedAt": "2026-01-15T12:00:00Z",
+            "channelTitle": "Canal de Benchmark",
+            "channelId": "UCbenchmark",
+            "defaultAudioLanguage": "pt",
+        },
+        "statistics": {
+            "viewCount": str(rng.randint(1000, 5_000_000)),
+            "likeCount": str(rng.randint(10, 200_000)),
+            "commentCount": str(comment_count),
+        },
+        "contentDetails": {"duration": f"PT{rng.randint(10, 59)}S"},
+        "status": {"madeForKids": False},
+    }
+
+
+def video_ids(count: int, prefix: str = "bench") -> List[str]:
+    # IDs de 11 caracteres, como os reais
+    return [f"{prefix}{n:06d}"[:11].ljust(11, "x") for n in range(count)]
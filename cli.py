@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+
+# Cada subcomando importa só o que usa: pandas, pyarrow, googleapiclient e selenium
+# ficam fora de `stats`, `reprocess --help` etc.
+COMMANDS = {
+    "collect": "coleta shorts (mesmas opções de main.py)",
+    "refresh": "atualiza views, likes e comentários dos vídeos acompanhados",
+    "reprocess": "regenera as saídas a partir das respostas da API gravadas, sem rede",
+    "duplicates": "marca comentários quase idênticos espalhados por vários vídeos",
+    "search": "busca textual em comentários, respostas, títulos, descrições e transcrições",
+    "stats": "resume coletas, cota gasta hoje e séries de estatísticas",
+}
+
+
+def run_collect(argv):
+    import main as collector
+
+    collector.run(argv)
+    return 0
+
+
+def run_refresh(argv):
+    from utils.stats_refresher import main as refresh_main
+
+    return refresh_main(argv)
+
+
+def run_reprocess(argv):
+    from utils.reprocess import main as reprocess_main
+
+    return reprocess_main(argv)
+
+
+def run_duplicates(argv):
+    from utils.near_duplicates import main as duplicates_main
+
+    return duplicates_main(argv)
+
+
+def run_search(argv):
+    from utils.search_index import main as search_main
+
+    return search_main(argv)
+
+
+def run_stats(argv):
+    from utils.corpus import Corpus
+    from utils.quota import key_fingerprint, quota_day
+    from utils.search_index import DEFAULT_SEARCH_INDEX_PATH, SearchIndex
+    from utils.seen_index import DEFAULT_SEEN_INDEX_PATH, SeenVideoIndex
+    from utils.stats_refresher import DEFAULT_STATS_STORE_PATH, StatsSeriesStore
+
+    parser = argparse.ArgumentParser(prog="cli.py stats", description=COMMANDS["stats"])
+    parser.add_argument("base_dir", nargs="?", default="dados")
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.base_dir)
+    corpus.refresh()
+    entries = list(corpus.entries.values())
+    collections = {entry["collection"] for entry in entries}
+    print(f"Coletas em {args.base_dir}: {len(collections)}")
+    print(f"  - {len(entries)} pastas de vídeo, {len(corpus.manifest)} vídeos distintos")
+    print(f"  - {sum(e['comment_count'] for e in entries)} comentários, {sum(e['reply_count'] for e in entries)} respostas")
+
+    seen_index_path = os.getenv("SEEN_INDEX_PATH", DEFAULT_SEEN_INDEX_PATH)
+    if os.path.exists(seen_index_path):
+        seen_index = SeenVideoIndex(seen_index_path)
+        print(f"Índice de vídeos vistos: {len(seen_index)} vídeos")
+        seen_index.close()
+
+    search_index_path = os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH)
+    if os.path.exists(search_index_path):
+        search_index = SearchIndex(search_index_path)
+        print(f"Índice de busca: {search_index.document_count()} textos de {len(search_index)} vídeos")
+        search_index.close()
+
+    store_path = os.getenv("STATS_STORE_PATH", DEFAULT_STATS_STORE_PATH)
+    if os.path.exists(store_path):
+        store = StatsSeriesStore(store_path)
+        print(f"Séries de estatísticas: {store.snapshot_count} snapshots de {len(store)} vídeos")
+
+    state_file = os.getenv("QUOTA_STATE_FILE", ".quota_state.json")
+    if state_file and os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        keys = [k.strip() for k in os.getenv("API_KEYS_YOUTUBE", os.getenv("API_KEY_YOUTUBE", "")).split(",") if k.strip()]
+        names = {key_fingerprint(key): f"chave {n + 1}" for n, key in enumerate(keys)}
+        today = quota_day()
+        print(f"Cota gasta hoje ({today}, horário do Pacífico):")
+        for fingerprint, entry in state.items():
+            if entry.get("day") == today:
+                status = " (esgotada)" if entry.get("exhausted") else ""
+                print(f"  - {names.get(fingerprint, fingerprint)}: {entry.get('spent', 0)} unidades{status}")
+    return 0
+
+
+HANDLERS = {
+    "collect": run_collect,
+    "refresh": run_refresh,
+    "reprocess": run_reprocess,
+    "duplicates": run_duplicates,
+    "search": run_search,
+    "stats": run_stats,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Coleta e análise de YouTube Shorts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(f"  {name:<10} {help_text}" for name, help_text in COMMANDS.items()),
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="COMANDO", help=", ".join(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="opções do subcomando (use COMANDO -h)")
+    args = parser.parse_args(argv)
+
+    # As mensagens de ajuda dos subcomandos mostram "cli.py COMANDO"
+    sys.argv[0] = f"{os.path.basename(sys.argv[0])} {args.command}"
+    return HANDLERS[args.command](args.args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,70 @@
 # %%
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import argparse
 import logging
 import os
-import time
+import threading
 
 
 from dotenv import load_dotenv
-from selenium import webdriver
+from googleapiclient.errors import HttpError
 from selenium.common.exceptions import (
     NoSuchElementException,
     TimeoutException,
     WebDriverException,
 )
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 
 from utils import (
+    METRICS,
+    CollectionJournal,
+    PipelineStage,
+    SearchIndex,
+    SeenVideoIndex,
+    StagedPipeline,
+    StatsSeriesStore,
+    StreamingCommentSink,
+    UNSUPPORTED_STREAMING_FORMATS,
+    TranscriptCache,
+    TranscriptFetcher,
+    VideoBatchQueue,
+    build_api_source,
+    expand_replies,
+    extract_video_info,
+    format_http_error,
     get_data_comments,
     get_data_videos,
-    get_transcription,
+    get_video_statistics_many,
+    fetch_transcript,
+    is_known_thread,
+    iter_comment_pages,
+    iter_previous_comments,
+    load_corpus,
+    load_previous_comments,
+    parse_output_formats,
     save_video_data,
+    transcript_text,
 )
 
 load_dotenv()
 
+STATS_LOCK = threading.Lock()
+INCREMENTAL_COMMENTS = os.getenv("INCREMENTAL_COMMENTS", "0") == "1"
+EXPAND_REPLIES = os.getenv("EXPAND_REPLIES", "1") == "1"
+REPLY_WORKERS = int(os.getenv("REPLY_WORKERS", "4"))
+STREAMING_COMMENTS = os.getenv("STREAMING_COMMENTS", "0") == "1"
+OUTPUT_FORMATS = parse_output_formats(os.getenv("OUTPUT_FORMATS"))
+SEEN_POLICY = os.getenv("SEEN_POLICY", "off")
+SEEN_MAX_AGE_DAYS = float(os.getenv("SEEN_MAX_AGE_DAYS", "0"))
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH", os.path.join(".cache", "seen_videos.sqlite"))
+STATS_STORE_PATH = os.getenv("STATS_STORE_PATH", os.path.join("dados", "estatisticas.jsonl"))
+SEARCH_INDEX = os.getenv("SEARCH_INDEX", "1") == "1"
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join("dados", "busca.sqlite"))
+BROWSER_DISCOVERY_SOURCES = ("feed",)
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", "2"))
+TRANSCRIPT_CACHE = os.getenv("TRANSCRIPT_CACHE", "1") == "1"
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join(".cache", "transcripts"))
+
 
 def setup_logging(log_dir="logs"):
     os.makedirs(log_dir, exist_ok=True)
@@ -54,15 +94,16 @@ def setup_logging(log_dir="logs"):
     return logger
 
 
-def validate_credentials():
+def validate_credentials(require_browser=True):
     logger = logging.getLogger("YoutubeCollector")
 
     required_vars = {
         "API_SERVICE_NAME": "Nome do serviço YouTube",
         "API_VERSION": "Versão da API",
         "API_KEY_YOUTUBE": "Chave de API do YouTube",
-        "BASE_ROUTE": "URL base do YouTube",
     }
+    if require_browser:
+        required_vars["BASE_ROUTE"] = "URL base do YouTube"
 
     missing_vars = []
     for var, description in required_vars.items():
@@ -79,129 +120,683 @@ def validate_credentials():
     return True
 
 
-def collect_video_data(driver, wait, video_index, num_videos,
-                       collection_folder, stats):
+class CollectionContext:
+
+    def __init__(self, collection_folder, num_videos, stats, dataset_store=None, seen_index=None,
+                 transcripts=None, journal=None, search_index=None, stats_store=None):
+        self.collection_folder = collection_folder
+        self.num_videos = num_videos
+        self.stats = stats
+        self.dataset_store = dataset_store
+        self.seen_index = seen_index
+        self.transcripts = transcripts
+        self.journal = journal
+        self.search_index = search_index
+        self.stats_store = stats_store
+        self.video_queue = None
+        self.stats_queue = None
+
+
+def update_stats(stats, **increments):
+    with STATS_LOCK:
+        for key, value in increments.items():
+            stats[key] += value
+
+
+def open_discovery_source(discovery_source, collection_mode):
     logger = logging.getLogger("YoutubeCollector")
 
-    try:
-        logger.info(f"\n{'='*60}")
-        logger.info(f"VÍDEO {video_index + 1}/{num_videos}")
-        logger.info("=" * 60)
+    if discovery_source not in BROWSER_DISCOVERY_SOURCES:
+        logger.info(f"Descoberta de vídeos pela API: {discovery_source}")
+        return build_api_source(discovery_source, os.getenv("DISCOVERY_TARGET", ""))
+
+    # Selenium só é carregado quando a descoberta usa o navegador
+    from utils import SeleniumFeedSource, ShortsDriverPool
+
+    base_route = os.getenv("BASE_ROUTE")
+    driver_pool_size = int(os.getenv("DRIVER_POOL_SIZE", "0"))
+    if driver_pool_size > 0:
+        logger.info(f"Iniciando {driver_pool_size} sessões headless do Chrome...")
+        source = ShortsDriverPool(
+            base_route,
+            size=driver_pool_size,
+            headless=os.getenv("HEADLESS", "1") == "1",
+        )
+    else:
+        logger.info("Iniciando WebDriver Chrome...")
+        settle_time = 0 if collection_mode == "pipeline" else 2
+        source = SeleniumFeedSource(base_route, settle_time=settle_time)
 
-        url_atual = driver.current_url
-        video_id = url_atual.split("/shorts/")[-1].split("?")[0]
-        logger.info(f"Video ID: {video_id}")
+    source.start()
+    return source
 
-        video_folder = os.path.join(collection_folder, f"video_{video_index+1}_{video_id}")
 
-        os.makedirs(video_folder, exist_ok=True)
+def log_video_header(video_index, video_id, num_videos):
+    logger = logging.getLogger("YoutubeCollector")
 
-        video_data = {"video_id": video_id, "url": url_atual}
+    logger.info(f"\n{'='*60}")
+    logger.info(f"VÍDEO {video_index + 1}/{num_videos}")
+    logger.info("=" * 60)
+    logger.info(f"Video ID: {video_id}")
 
-        logger.info("Buscando informações do vídeo...")
-        data_video = get_data_videos(video_id)
-        if "error" in data_video:
-            logger.error(f"❌ Erro ao buscar vídeo: {data_video['error']}")
-            stats["videos_com_erro"] += 1
-            return False
 
-        video_data["video_details"] = data_video
-        logger.info("✓ Informações do vídeo obtidas")
+def fetch_video_details(video_id, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    logger.info(f"[{video_id}] Buscando informações do vídeo...")
+    with METRICS.timer("video.details"):
+        if ctx.video_queue is not None:
+            data_video = ctx.video_queue.get(video_id)
+        else:
+            data_video = get_data_videos(video_id)
+    if "error" in data_video:
+        logger.error(f"❌ [{video_id}] Erro ao buscar vídeo: {data_video['error']}")
+        update_stats(ctx.stats, videos_com_erro=1)
+        return None
 
-        logger.info("Buscando comentários e respostas...")
-        data_comments = get_data_comments(video_id)
+    logger.info(f"✓ [{video_id}] Informações do vídeo obtidas")
+    return data_video
 
-        if isinstance(data_comments, dict) and "error" in data_comments:
-            logger.warning(
-                f"⚠️  Não foi possível coletar comentários: "
-                f"{data_comments['error']}"
+
+def fetch_video_statistics(video_id, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    # videos.statistics não passa pelo cache de respostas: a atualização sempre traz as contagens atuais
+    with METRICS.timer("video.statistics"):
+        if ctx.stats_queue is not None:
+            statistics = ctx.stats_queue.get(video_id)
+        else:
+            statistics = get_video_statistics_many([video_id]).get(
+                video_id, {"error": "Vídeo não retornado pela API"}
             )
-            data_comments = []
-        elif isinstance(data_comments, list):
-            logger.info(f"✓ {len(data_comments)} comentários coletados")
-            total_replies = sum(len(c.get("replies", [])) for c in data_comments)
-            logger.info(f"✓ {total_replies} respostas coletadas")
-            stats["total_comentarios"] += len(data_comments)
-            stats["total_respostas"] += total_replies
-
-        video_data["comments_data"] = data_comments
-
-        logger.info("Buscando transcrição...")
-        transcription = get_transcription(video_id)
-        if transcription:
-            logger.info(f"✓ Transcrição obtida ({len(transcription)} caracteres)")
+    if "error" in statistics:
+        logger.error(f"❌ [{video_id}] Erro ao atualizar estatísticas: {statistics['error']}")
+        update_stats(ctx.stats, videos_com_erro=1)
+        return None
+    return statistics
+
+
+def load_incremental_state(video_id):
+    logger = logging.getLogger("YoutubeCollector")
+
+    previous_comments = load_previous_comments(video_id)
+    known_ids = {c["comment_id"] for c in previous_comments}
+    since = max((c.get("published_at", "") for c in previous_comments), default="")
+    if previous_comments:
+        logger.info(
+            f"[{video_id}] {len(previous_comments)} comentários já coletados, buscando apenas novos"
+        )
+    return previous_comments, known_ids, since
+
+
+def load_incremental_ids(video_id):
+    logger = logging.getLogger("YoutubeCollector")
+
+    known_ids, since = set(), ""
+    for comment in iter_previous_comments(video_id):
+        known_ids.add(comment["comment_id"])
+        since = max(since, comment.get("published_at", ""))
+    if known_ids:
+        logger.info(f"[{video_id}] {len(known_ids)} comentários já coletados, buscando apenas novos")
+    return known_ids, since
+
+
+def replay_comment_checkpoint(video_id, sink, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    # Páginas já confirmadas no journal voltam para o sink, uma por vez, antes de seguir pela API
+    new_ids, page_token, pages = set(), None, 0
+    if ctx.journal is not None:
+        for page in ctx.journal.iter_checkpoint_pages(video_id):
+            new_ids.update(sink.write_threads(page["threads"]))
+            page_token = page["next_page_token"]
+            pages += 1
+    if pages:
+        logger.info(f"↻ [{video_id}] {len(new_ids)} comentários recuperados do journal ({pages} páginas)")
+    return new_ids, page_token, pages > 0 and page_token is None
+
+
+def expand_thread_replies(video_id, threads, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    if not EXPAND_REPLIES:
+        return
+    extra_calls = expand_replies(threads, REPLY_WORKERS)
+    if extra_calls:
+        logger.info(f"✓ [{video_id}] {extra_calls} chamadas extras para respostas completas")
+    update_stats(ctx.stats, chamadas_respostas_extras=extra_calls)
+
+
+def start_transcription(video_id, ctx):
+    if ctx.transcripts is not None:
+        ctx.transcripts.submit(video_id)
+
+
+def fetch_transcription(video_id, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    logger.info(f"[{video_id}] Buscando transcrição...")
+    with METRICS.timer("transcript.wait"):
+        if ctx.transcripts is not None:
+            transcript = ctx.transcripts.get(video_id)
         else:
-            logger.warning("⚠️  Transcrição não disponível")
-        video_data["transcription"] = transcription
+            transcript = fetch_transcript(video_id)
+
+    transcription = transcript_text(transcript)
+    if transcription:
+        logger.info(
+            f"✓ [{video_id}] Transcrição obtida ({len(transcript['text'])} trechos, "
+            f"{len(transcription)} caracteres)"
+        )
+    else:
+        logger.warning(f"⚠️  [{video_id}] Transcrição não disponível")
+    return transcript
+
+
+def open_seen_index(base_dir):
+    logger = logging.getLogger("YoutubeCollector")
 
-        logger.info("Salvando dados coletados...")
-        save_video_data(video_data, video_folder)
-        logger.info("✓ Dados salvos com sucesso")
+    if SEEN_POLICY == "off":
+        return None
 
-        stats["videos_coletados"] += 1
+    seen_index = SeenVideoIndex(SEEN_INDEX_PATH)
+    if len(seen_index) == 0:
+        imported = seen_index.import_entries(load_corpus(base_dir).entries.values())
+        logger.info(f"Índice de vídeos vistos criado a partir de {imported} vídeos já coletados")
+    return seen_index
 
-        logger.info("Navegando para próximo vídeo...")
-        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ARROW_DOWN)
-        wait.until(lambda d: d.current_url != url_atual)
-        time.sleep(2)
 
+def handle_seen_video(video_id, url_atual, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    if ctx.seen_index is None:
+        return False
+
+    action = ctx.seen_index.decide(video_id, SEEN_POLICY, SEEN_MAX_AGE_DAYS)
+    if action == "skip":
+        logger.info(f"↷ [{video_id}] Vídeo já coletado, ignorando")
+        if ctx.video_queue is not None:
+            ctx.video_queue.discard(video_id)
+        update_stats(ctx.stats, videos_ja_vistos=1)
         return True
 
-    except (TimeoutException, NoSuchElementException) as e:
-        logger.warning(f"⚠️  Não foi possível navegar para próximo vídeo: {e}")
+    if action == "stats":
+        logger.info(f"↻ [{video_id}] Vídeo já coletado, atualizando apenas estatísticas")
+        statistics = fetch_video_statistics(video_id, ctx)
+        if statistics is None:
+            return True
+        ctx.seen_index.record_stats(video_id)
+        record_stats_snapshot(video_id, statistics, ctx)
+        update_stats(ctx.stats, videos_ja_vistos=1, estatisticas_atualizadas=1)
+        return True
+
+    return False
+
+
+def enqueue_video_details(video_id, ctx):
+    # Vídeos que serão pulados não entram no lote de videos.list (nem gastam cota); os que só
+    # atualizam estatísticas vão para o lote de videos.statistics
+    action = ctx.seen_index.decide(video_id, SEEN_POLICY, SEEN_MAX_AGE_DAYS) if ctx.seen_index is not None else "collect"
+    if action == "stats":
+        ctx.stats_queue.add(video_id)
+    elif action != "skip":
+        ctx.video_queue.add(video_id)
+
+
+def record_stats_snapshot(video_id, video_info, ctx):
+    # Mesma série do stats_refresher: engagement_over_time lê tudo de estatisticas.jsonl
+    if ctx.stats_store is not None and video_info:
+        ctx.stats_store.append({video_id: video_info})
+
+
+def mark_video_seen(video_id, video_folder, video_info, ctx):
+    if ctx.seen_index is not None:
+        ctx.seen_index.mark_collected(video_id, os.path.basename(ctx.collection_folder), video_folder)
+    record_stats_snapshot(video_id, video_info, ctx)
+
+
+def finish_video(video_id, video_folder, video_info, ctx):
+    def done():
+        mark_video_seen(video_id, video_folder, video_info, ctx)
+        record_video_done(video_id, ctx)
+
+    # Com o dataset Parquet o vídeo só é dado como concluído depois que as linhas do buffer chegam ao disco:
+    # uma coleta interrompida antes disso coleta o vídeo de novo em vez de perdê-lo
+    if ctx.dataset_store is not None:
+        ctx.dataset_store.after_flush(done)
+    else:
+        done()
+
+
+def record_video_started(video_index, video_id, url_atual, ctx):
+    if ctx.journal is not None:
+        ctx.journal.video_started(video_index, video_id, url_atual)
+
+
+def record_video_done(video_id, ctx):
+    if ctx.journal is not None:
+        ctx.journal.video_done(video_id)
+
+
+def record_video_failed(video_id, error, ctx):
+    if ctx.journal is not None:
+        ctx.journal.video_failed(video_id, str(error))
+
+
+def fetch_comment_threads(video_id, ctx, **kwargs):
+    logger = logging.getLogger("YoutubeCollector")
+
+    if ctx.journal is None:
+        return get_data_comments(video_id, **kwargs)
+
+    saved_threads, page_token, complete = ctx.journal.comment_checkpoint(video_id)
+    if complete:
+        logger.info(f"↻ [{video_id}] {len(saved_threads)} comentários recuperados do journal")
+        return saved_threads
+    if saved_threads:
+        logger.info(f"↻ [{video_id}] Retomando comentários após {len(saved_threads)} já salvos")
+
+    data_comments = get_data_comments(
+        video_id,
+        page_token=page_token,
+        on_page=lambda threads, token: ctx.journal.commit_page(video_id, threads, token),
+        **kwargs,
+    )
+    if isinstance(data_comments, list):
+        return saved_threads + data_comments
+    return data_comments
+
+
+def fetch_video_data(video_index, video_id, url_atual, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+    log_video_header(video_index, video_id, ctx.num_videos)
+
+    video_data = {"video_id": video_id, "url": url_atual}
+    record_video_started(video_index, video_id, url_atual, ctx)
+
+    data_video = fetch_video_details(video_id, ctx)
+    if data_video is None:
+        record_video_failed(video_id, "erro ao buscar vídeo", ctx)
+        return None
+    video_data["video_details"] = data_video
+    start_transcription(video_id, ctx)
+
+    logger.info(f"[{video_id}] Buscando comentários e respostas...")
+    if INCREMENTAL_COMMENTS:
+        previous_comments, known_ids, since = load_incremental_state(video_id)
+        video_data["previous_comments"] = previous_comments
+        data_comments = fetch_comment_threads(video_id, ctx, known_comment_ids=known_ids, since=since)
+    else:
+        data_comments = fetch_comment_threads(video_id, ctx)
+
+    if isinstance(data_comments, dict) and "error" in data_comments:
+        logger.warning(
+            f"⚠️  [{video_id}] Não foi possível coletar comentários: "
+            f"{data_comments['error']}"
+        )
+        data_comments = []
+    elif isinstance(data_comments, list):
+        expand_thread_replies(video_id, data_comments, ctx)
+        logger.info(f"✓ [{video_id}] {len(data_comments)} comentários coletados")
+        total_replies = sum(len(c.get("replies", [])) for c in data_comments)
+        logger.info(f"✓ [{video_id}] {total_replies} respostas coletadas")
+        update_stats(
+            ctx.stats,
+            total_comentarios=len(data_comments),
+            total_respostas=total_replies,
+        )
+
+    video_data["comments_data"] = data_comments
+    transcript = fetch_transcription(video_id, ctx)
+    video_data["transcript"] = transcript
+    video_data["transcription"] = transcript_text(transcript)
+
+    return video_data
+
+
+def stream_video_data(video_index, video_id, url_atual, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+    log_video_header(video_index, video_id, ctx.num_videos)
+
+    record_video_started(video_index, video_id, url_atual, ctx)
+
+    data_video = fetch_video_details(video_id, ctx)
+    if data_video is None:
+        record_video_failed(video_id, "erro ao buscar vídeo", ctx)
         return False
+
+    video_folder = os.path.join(ctx.collection_folder, f"video_{video_index+1}_{video_id}")
+    os.makedirs(video_folder, exist_ok=True)
+    video_info = extract_video_info({"video_id": video_id, "url": url_atual}, data_video)
+    start_transcription(video_id, ctx)
+
+    known_ids, since = set(), ""
+    if INCREMENTAL_COMMENTS:
+        known_ids, since = load_incremental_ids(video_id)
+
+    logger.info(f"[{video_id}] Gravando comentários em streaming...")
+    sink = StreamingCommentSink(video_folder, video_id, OUTPUT_FORMATS, ctx.dataset_store)
+    try:
+        new_ids, page_token, complete = replay_comment_checkpoint(video_id, sink, ctx)
+        order = "time" if known_ids or since else None
+        if not complete:
+            for threads, next_page_token in iter_comment_pages(video_id, order=order, page_token=page_token):
+                new_threads = [t for t in threads if not is_known_thread(t, known_ids, since)]
+                expand_thread_replies(video_id, new_threads, ctx)
+                new_ids.update(sink.write_threads(new_threads))
+                reached_known = len(new_threads) < len(threads)
+                if ctx.journal is not None:
+                    ctx.journal.commit_page(video_id, new_threads, None if reached_known else next_page_token)
+                if reached_known:
+                    break
+
+    except HttpError as error:
+        logger.warning(
+            f"⚠️  [{video_id}] Não foi possível coletar comentários: "
+            f"{format_http_error(error)['error']}"
+        )
+    except BaseException:
+        sink.abort()
+        raise
+
+    logger.info(f"✓ [{video_id}] {sink.total_comments} comentários coletados")
+    logger.info(f"✓ [{video_id}] {sink.total_replies} respostas coletadas")
+    update_stats(
+        ctx.stats,
+        total_comentarios=sink.total_comments,
+        total_respostas=sink.total_replies,
+    )
+    if INCREMENTAL_COMMENTS:
+        # Relidos do disco em streaming, sem manter a coleta anterior em memória
+        sink.write_comments(c for c in iter_previous_comments(video_id) if c["comment_id"] not in new_ids)
+
+    transcript = fetch_transcription(video_id, ctx)
+    with METRICS.timer("save.streaming"):
+        sink.close(video_info, transcript_text(transcript), transcript, data_video, url_atual)
+    if ctx.search_index is not None:
+        with METRICS.timer("save.search_index"):
+            ctx.search_index.index_folders([video_folder])
+    logger.info(f"✓ [{video_id}] Dados salvos com sucesso")
+    finish_video(video_id, video_folder, video_info, ctx)
+
+    update_stats(ctx.stats, videos_coletados=1)
+    return True
+
+
+def store_video_data(video_index, video_data, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+    video_id = video_data["video_id"]
+
+    video_folder = os.path.join(ctx.collection_folder, f"video_{video_index+1}_{video_id}")
+    os.makedirs(video_folder, exist_ok=True)
+
+    logger.info(f"[{video_id}] Salvando dados coletados...")
+    if not save_video_data(video_data, video_folder, OUTPUT_FORMATS, ctx.dataset_store, ctx.search_index):
+        logger.error(f"❌ [{video_id}] Falha ao salvar os dados do vídeo")
+        update_stats(ctx.stats, videos_com_erro=1)
+        record_video_failed(video_id, "erro ao salvar dados", ctx)
+        return False
+
+    logger.info(f"✓ [{video_id}] Dados salvos com sucesso")
+    finish_video(
+        video_id, video_folder, extract_video_info(video_data, video_data["video_details"]), ctx
+    )
+
+    update_stats(ctx.stats, videos_coletados=1)
+    return True
+
+
+def collect_video_data(video_index, video_id, url_atual, ctx):
+    logger = logging.getLogger("YoutubeCollector")
+
+    try:
+        if handle_seen_video(video_id, url_atual, ctx):
+            return True
+
+        with METRICS.timer("video.total"):
+            if STREAMING_COMMENTS:
+                return stream_video_data(video_index, video_id, url_atual, ctx)
+
+            video_data = fetch_video_data(video_index, video_id, url_atual, ctx)
+            if video_data is None:
+                return False
+
+            return store_video_data(video_index, video_data, ctx)
+
     except Exception as e:
-        logger.error(f"❌ Erro ao processar vídeo: {e}", exc_info=True)
-        stats["videos_com_erro"] += 1
+        logger.error(f"❌ [{video_id}] Erro ao processar vídeo: {e}", exc_info=True)
+        update_stats(ctx.stats, videos_com_erro=1)
+        record_video_failed(video_id, e, ctx)
         return False
 
 
-def process_videos(driver, wait, num_videos, collection_folder, stats):
+def process_videos(videos, ctx):
     logger = logging.getLogger("YoutubeCollector")
 
-    for i in range(num_videos):
-        success = collect_video_data(driver, wait, i, num_videos, collection_folder, stats)
-        if not success:
-            logger.warning(f"Interrompendo coleta após erro no vídeo {i + 1}")
+    try:
+        for video_index, video_id, url_atual in videos:
+            success = collect_video_data(video_index, video_id, url_atual, ctx)
+            if not success:
+                logger.warning(f"Vídeo {video_index + 1} não coletado, seguindo para o próximo")
+    except (TimeoutException, NoSuchElementException) as e:
+        logger.warning(f"⚠️  Não foi possível navegar para próximo vídeo: {e}")
+
+
+def process_videos_concurrently(videos, ctx, max_workers):
+    logger = logging.getLogger("YoutubeCollector")
+    logger.info(f"Coleta concorrente com até {max_workers} vídeos em paralelo")
+
+    ctx.video_queue = VideoBatchQueue()
+    ctx.stats_queue = VideoBatchQueue(fetch_many=get_video_statistics_many)
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="coleta") as executor:
+        try:
+            for video_index, video_id, url_atual in videos:
+                enqueue_video_details(video_id, ctx)
+                future = executor.submit(collect_video_data, video_index, video_id, url_atual, ctx)
+                futures[future] = video_id
+        except (TimeoutException, NoSuchElementException) as e:
+            logger.warning(f"⚠️  Não foi possível navegar para próximo vídeo: {e}")
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ [{futures[future]}] Falha no worker: {e}", exc_info=True)
+                update_stats(ctx.stats, videos_com_erro=1)
+                record_video_failed(futures[future], e, ctx)
+
+
+def run_collection_pipeline(videos, ctx, max_workers, queue_size):
+    logger = logging.getLogger("YoutubeCollector")
+    logger.info(
+        f"Coleta em pipeline: {max_workers} workers de busca, fila de {queue_size} vídeos"
+    )
+
+    ctx.video_queue = VideoBatchQueue()
+    ctx.stats_queue = VideoBatchQueue(fetch_many=get_video_statistics_many)
+
+    def discovered_videos():
+        for video_index, video_id, url_atual in videos:
+            enqueue_video_details(video_id, ctx)
+            yield video_index, video_id, url_atual
+
+    def fetch_stage(item):
+        video_index, video_id, url_atual = item
+        if handle_seen_video(video_id, url_atual, ctx):
+            return None
+
+        if STREAMING_COMMENTS:
+            stream_video_data(video_index, video_id, url_atual, ctx)
+            return None
+
+        video_data = fetch_video_data(video_index, video_id, url_atual, ctx)
+        if video_data is None:
+            return None
+        return video_index, video_data
+
+    def save_stage(item):
+        video_index, video_data = item
+        store_video_data(video_index, video_data, ctx)
+
+    def on_error(stage_name, item, error):
+        video_id = item[1]["video_id"] if stage_name == "gravacao" else item[1]
+        logger.error(f"❌ [{video_id}] Erro no estágio {stage_name}: {error}", exc_info=error)
+        update_stats(ctx.stats, videos_com_erro=1)
+        record_video_failed(video_id, error, ctx)
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage("busca", fetch_stage, workers=max_workers),
+            PipelineStage("gravacao", save_stage, workers=1),
+        ],
+        queue_size=queue_size,
+        on_error=on_error,
+    )
+
+    try:
+        pipeline.run(discovered_videos())
+    except (TimeoutException, NoSuchElementException) as e:
+        logger.warning(f"⚠️  Não foi possível navegar para próximo vídeo: {e}")
+
+
+def resolve_collection_folder(resume, base_dir):
+    if os.path.isdir(resume):
+        return resume
+    candidate = os.path.join(base_dir, resume)
+    if os.path.isdir(candidate):
+        return candidate
+    return None
+
+
+def resume_videos(journal, discovery, num_videos):
+    logger = logging.getLogger("YoutubeCollector")
+
+    pending = journal.pending_videos()
+    if pending:
+        logger.info(f"↻ Retomando {len(pending)} vídeos interrompidos")
+    yield from pending
+
+    known = set(journal.videos)
+    remaining = num_videos - len(known)
+    if remaining <= 0:
+        return
+
+    video_index = journal.next_index()
+    for _, video_id, url_atual in discovery.discover(remaining + len(known)):
+        if video_id in known:
+            continue
+        yield video_index, video_id, url_atual
+        video_index += 1
+        remaining -= 1
+        if remaining <= 0:
             break
 
 
-def main():
+def export_metrics(collection_folder, stats):
+    logger = logging.getLogger("YoutubeCollector")
+
+    run_stats = {key: value for key, value in stats.items() if key != "inicio"}
+    METRICS.write_json(os.path.join(collection_folder, "metricas.json"), {"stats": run_stats})
+    METRICS.write_prometheus(os.path.join(collection_folder, "metricas.prom"))
+
+    api_calls = METRICS.summary("api.commentThreads.list")
+    latest_calls = METRICS.summary("api.commentThreads.latest")
+    logger.info(
+        f"📊 Cota gasta: {METRICS.snapshot()['counters'].get('quota.units', 0):g} unidades | "
+        f"páginas de comentários: {api_calls['count'] + latest_calls['count']} (p90 {api_calls['p90']:.2f}s)"
+    )
+
+
+def main(resume=None):
     logger = setup_logging()
-    driver = None
+    collection_folder = None
+    discovery = None
+    dataset_store = None
+    seen_index = None
+    search_index = None
+    transcripts = None
 
     stats = {
         "videos_coletados": 0,
         "videos_com_erro": 0,
         "total_comentarios": 0,
         "total_respostas": 0,
+        "chamadas_respostas_extras": 0,
+        "videos_ja_vistos": 0,
+        "estatisticas_atualizadas": 0,
         "inicio": datetime.now(),
     }
 
     try:
+        discovery_source = os.getenv("DISCOVERY_SOURCE", "feed")
+
+        unsupported = [fmt for fmt in OUTPUT_FORMATS if fmt in UNSUPPORTED_STREAMING_FORMATS]
+        if STREAMING_COMMENTS and unsupported:
+            logger.error(
+                f"❌ STREAMING_COMMENTS=1 não é compatível com OUTPUT_FORMATS={','.join(unsupported)} "
+                "(o dump completo exige o vídeo inteiro em memória; use archive)"
+            )
+            return
+
         logger.info("Iniciando validação de credenciais...")
-        if not validate_credentials():
+        if not validate_credentials(discovery_source in BROWSER_DISCOVERY_SOURCES):
             logger.error("❌ Falha na validação de credenciais")
             return
 
-        logger.info("Iniciando WebDriver Chrome...")
-        driver = webdriver.Chrome()
-
-        base_route = os.getenv("BASE_ROUTE")
-        driver.get(base_route)
-        wait = WebDriverWait(driver, 10)
-        time.sleep(3)
+        num_videos = int(os.getenv("NUM_VIDEOS", "2"))
+        max_workers = int(os.getenv("MAX_WORKERS", "1"))
+        collection_mode = os.getenv(
+            "COLLECTION_MODE", "executor" if max_workers > 1 else "sequential"
+        )
+        discovery = open_discovery_source(discovery_source, collection_mode)
 
         base_dir = "dados"
         os.makedirs(base_dir, exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        collection_folder = os.path.join(base_dir, f"coleta_{timestamp}")
-        os.makedirs(collection_folder, exist_ok=True)
-        logger.info(f"📁 Pasta da coleta criada: {collection_folder}")
+        if resume:
+            collection_folder = resolve_collection_folder(resume, base_dir)
+            if collection_folder is None:
+                logger.error(f"❌ Coleta não encontrada para retomar: {resume}")
+                return
+            logger.info(f"📁 Retomando coleta: {collection_folder}")
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            collection_folder = os.path.join(base_dir, f"coleta_{timestamp}")
+            os.makedirs(collection_folder, exist_ok=True)
+            logger.info(f"📁 Pasta da coleta criada: {collection_folder}")
+        journal = CollectionJournal(collection_folder)
+
+        if "parquet" in OUTPUT_FORMATS:
+            from utils import ParquetDatasetStore
+
+            dataset_store = ParquetDatasetStore(os.path.basename(collection_folder))
+        seen_index = open_seen_index(base_dir)
+        # Com o índice de vídeos vistos, cada coleta também acrescenta um snapshot à série de estatísticas
+        stats_store = StatsSeriesStore(STATS_STORE_PATH) if seen_index is not None else None
+        if SEARCH_INDEX:
+            search_index = SearchIndex(SEARCH_INDEX_PATH)
+        transcripts = TranscriptFetcher(
+            TRANSCRIPT_WORKERS, TranscriptCache(TRANSCRIPT_CACHE_DIR) if TRANSCRIPT_CACHE else None
+        )
+        ctx = CollectionContext(
+            collection_folder, num_videos, stats, dataset_store, seen_index, transcripts, journal, search_index,
+            stats_store,
+        )
+
+        if resume:
+            videos = resume_videos(journal, discovery, num_videos)
+        else:
+            videos = discovery.discover(num_videos)
 
-        num_videos = 2
-        process_videos(driver, wait, num_videos, collection_folder, stats)
+        if collection_mode == "pipeline":
+            queue_size = int(os.getenv("QUEUE_SIZE", "8"))
+            run_collection_pipeline(videos, ctx, max_workers, queue_size)
+        elif collection_mode == "executor":
+            process_videos_concurrently(videos, ctx, max_workers)
+        else:
+            process_videos(videos, ctx)
 
         duracao = datetime.now() - stats["inicio"]
         logger.info(f"\n{'='*60}")
@@ -211,6 +806,11 @@ def main():
         logger.info(f"❌ Vídeos com erro: {stats['videos_com_erro']}")
         logger.info(f"📝 Total de comentários: {stats['total_comentarios']}")
         logger.info(f"💬 Total de respostas: {stats['total_respostas']}")
+        logger.info(f"🔁 Chamadas extras para respostas: {stats['chamadas_respostas_extras']}")
+        logger.info(
+            f"↷ Vídeos já vistos: {stats['videos_ja_vistos']} "
+            f"({stats['estatisticas_atualizadas']} com estatísticas atualizadas)"
+        )
         logger.info(f"⏱️  Tempo total: {duracao}")
         logger.info(f"📁 Dados salvos em: {collection_folder}")
         logger.info("✓ Coleta finalizada com sucesso!")
@@ -220,10 +820,31 @@ def main():
     except Exception as e:
         logger.error(f"❌ Erro fatal: {e}", exc_info=True)
     finally:
-        if driver:
-            logger.info("Fechando WebDriver...")
-            driver.quit()
+        if dataset_store is not None:
+            dataset_store.close()
+        if collection_folder is not None:
+            export_metrics(collection_folder, stats)
+        if seen_index is not None:
+            seen_index.close()
+        if search_index is not None:
+            search_index.close()
+        if transcripts is not None:
+            transcripts.close()
+        if discovery is not None:
+            logger.info("Encerrando fonte de descoberta...")
+            discovery.close()
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Coleta de dados de YouTube Shorts")
+    parser.add_argument(
+        "--resume",
+        metavar="COLETA",
+        help="retoma uma coleta interrompida (pasta ou nome, ex.: coleta_20260218_103755)",
+    )
+    args = parser.parse_args(argv)
+    main(resume=args.resume)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run()
\ No newline at end of file
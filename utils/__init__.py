@@ -1,10 +1,122 @@
-from .youtube_api import YoutubeApi, get_data_videos, get_data_comments, get_transcription
-from .data_processing import save_video_data
+import importlib
+
+# Exportações carregadas sob demanda (PEP 562): `import utils` não importa pandas, pyarrow,
+# googleapiclient nem selenium até que algo que dependa deles seja usado
+_EXPORTS = {
+    'YoutubeApi': 'youtube_api',
+    'VideoBatchQueue': 'youtube_api',
+    'expand_replies': 'youtube_api',
+    'format_http_error': 'youtube_api',
+    'get_data_videos': 'youtube_api',
+    'get_data_videos_many': 'youtube_api',
+    'get_video_statistics_many': 'youtube_api',
+    'get_data_comments': 'youtube_api',
+    'get_transcription': 'youtube_api',
+    'is_known_thread': 'youtube_api',
+    'iter_comment_pages': 'youtube_api',
+    'extract_video_info': 'data_processing',
+    'load_previous_comments': 'data_processing',
+    'iter_previous_comments': 'data_processing',
+    'parse_output_formats': 'data_processing',
+    'save_video_data': 'data_processing',
+    'iter_archive': 'archive',
+    'Corpus': 'corpus',
+    'load_corpus': 'corpus',
+    'SeleniumFeedSource': 'driver_pool',
+    'ShortsDriverPool': 'driver_pool',
+    'shorts_video_id': 'driver_pool',
+    'DiscoverySource': 'discovery',
+    'SearchSource': 'discovery',
+    'PlaylistSource': 'discovery',
+    'ChannelUploadsSource': 'discovery',
+    'IdFileSource': 'discovery',
+    'build_api_source': 'discovery',
+    'CollectionJournal': 'journal',
+    'METRICS': 'metrics',
+    'MetricsRegistry': 'metrics',
+    'ParquetDatasetStore': 'dataset_store',
+    'read_dataset': 'dataset_store',
+    'SeenVideoIndex': 'seen_index',
+    'SearchIndex': 'search_index',
+    'StatsRefresher': 'stats_refresher',
+    'StatsSeriesStore': 'stats_refresher',
+    'engagement_over_time': 'stats_refresher',
+    'MinHasher': 'near_duplicates',
+    'find_near_duplicates': 'near_duplicates',
+    'load_near_duplicates': 'near_duplicates',
+    'PipelineStage': 'pipeline',
+    'StagedPipeline': 'pipeline',
+    'StreamingCommentSink': 'streaming',
+    'UNSUPPORTED_STREAMING_FORMATS': 'streaming',
+    'TranscriptCache': 'transcripts',
+    'TranscriptFetcher': 'transcripts',
+    'fetch_transcript': 'transcripts',
+    'transcript_text': 'transcripts',
+}
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     'YoutubeApi',
+    'VideoBatchQueue',
+    'expand_replies',
+    'format_http_error',
     'get_data_videos',
+    'get_data_videos_many',
+    'get_video_statistics_many',
     'get_data_comments',
     'get_transcription',
+    'is_known_thread',
+    'iter_comment_pages',
+    'extract_video_info',
+    'load_previous_comments',
+    'iter_previous_comments',
+    'parse_output_formats',
     'save_video_data',
+    'iter_archive',
+    'Corpus',
+    'load_corpus',
+    'SeleniumFeedSource',
+    'ShortsDriverPool',
+    'shorts_video_id',
+    'DiscoverySource',
+    'SearchSource',
+    'PlaylistSource',
+    'ChannelUploadsSource',
+    'IdFileSource',
+    'build_api_source',
+    'CollectionJournal',
+    'METRICS',
+    'MetricsRegistry',
+    'ParquetDatasetStore',
+    'read_dataset',
+    'SeenVideoIndex',
+    'SearchIndex',
+    'StatsRefresher',
+    'StatsSeriesStore',
+    'engagement_over_time',
+    'MinHasher',
+    'find_near_duplicates',
+    'load_near_duplicates',
+    'PipelineStage',
+    'StagedPipeline',
+    'StreamingCommentSink',
+    'UNSUPPORTED_STREAMING_FORMATS',
+    'TranscriptCache',
+    'TranscriptFetcher',
+    'fetch_transcript',
+    'transcript_text',
 ]
\ No newline at end of file
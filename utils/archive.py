@@ -0,0 +1,96 @@
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+ARCHIVE_FILE = "arquivo.jsonl.gz"
+# Nível 1: a gravação a cada coleta pesa mais que os poucos MB a menos dos níveis altos
+ARCHIVE_COMPRESS_LEVEL = 1
+
+LINE_METADATA = "metadata"
+LINE_VIDEO = "video"
+LINE_COMMENT = "comment"
+# Thread remontada a partir da API (comentário principal, respostas expandidas e totalReplyCount),
+# não o recurso commentThreads original
+LINE_THREAD = "thread"
+# Nome antigo da mesma linha, ainda lido nos arquivos já gravados
+LINE_LEGACY_RAW_THREAD = "raw_thread"
+LINE_TRANSCRIPT = "transcript"
+LINE_ENGAGEMENT = "engagement"
+
+
+def dumps_line(data: Dict) -> bytes:
+    # Texto sem escapes (UTF-8) para que zgrep encontre palavras acentuadas e emojis
+    return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class ArchiveWriter:
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.lines = 0
+
+    def write(self, line_type: str, **fields) -> None:
+        self._stream.write(dumps_line({"type": line_type, **fields}))
+        self.lines += 1
+
+    def write_many(self, line_type: str, rows: Iterable[Dict]) -> None:
+        for row in rows:
+            self.write(line_type, **row)
+
+
+@contextmanager
+def open_archive(path: str, compresslevel: int = ARCHIVE_COMPRESS_LEVEL):
+    tmp_file = f"{path}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=compresslevel, mtime=0) as gz:
+                yield ArchiveWriter(gz)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def iter_archive(path: str, types: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    # "type" é sempre a primeira chave: linhas de outros tipos são puladas sem decodificar o JSON
+    prefixes = tuple(b'{"type":"%s"' % t.encode() for t in types) if types else None
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if not line.strip() or (prefixes and not line.startswith(prefixes)):
+                continue
+            yield json.loads(line)
+
+
+def read_archive_comments(path: str) -> List[Dict]:
+    return [line["record"] for line in iter_archive(path, (LINE_COMMENT,))]
+
+
+def read_archive_payload(path: str) -> Dict:
+    # Reconstrói a entrada de save_video_data a partir das respostas da API guardadas
+    payload = {"comments_data": [], "previous_comments": []}
+    comments = []
+    for line in iter_archive(path):
+        line_type = line.get("type")
+        if line_type == LINE_METADATA:
+            payload["collected_at"] = line.get("collected_at")
+        elif line_type == LINE_VIDEO:
+            payload["video_id"] = line.get("video_id")
+            payload["url"] = line.get("url", "")
+            payload["video_details"] = line.get("raw") or {}
+        elif line_type == LINE_COMMENT:
+            comments.append(line["record"])
+        elif line_type == LINE_THREAD:
+            payload["comments_data"].append(line["thread"])
+        elif line_type == LINE_LEGACY_RAW_THREAD:
+            payload["comments_data"].append(line["raw"])
+        elif line_type == LINE_TRANSCRIPT:
+            payload["transcript"] = line.get("raw")
+            payload["transcription"] = line.get("text", "")
+
+    # Comentários sem thread da API vieram da mesclagem com uma coleta anterior
+    raw_ids = {thread.get("comment", {}).get("id") for thread in payload["comments_data"]}
+    payload["previous_comments"] = [c for c in comments if c.get("comment_id") not in raw_ids]
+    return payload
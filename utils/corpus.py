@@ -0,0 +1,251 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .archive import LINE_COMMENT, iter_archive, read_archive_comments
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+PARALLEL_PARSE_THRESHOLD = 8
+
+
+def read_json_file(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_jsonl_file(path: str) -> List[Dict]:
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_video_file(json_file: str) -> Dict:
+    data = read_json_file(json_file)
+    folder = os.path.dirname(json_file)
+
+    comments = data.get("comments")
+    if comments is None and data.get("comments_file"):
+        comments_file = os.path.join(folder, data["comments_file"])
+        if not os.path.exists(comments_file):
+            comments = []
+        elif comments_file.endswith(".gz"):
+            comments = read_archive_comments(comments_file)
+        else:
+            comments = read_jsonl_file(comments_file)
+
+    transcription = data.get("transcription", "")
+    segments = None
+    if isinstance(transcription, dict):
+        segments = transcription.get("segments")
+        transcription = transcription.get("text", "")
+
+    video = data.get("video", {})
+    if not video.get("video_id"):
+        video = {**video, "video_id": os.path.basename(folder).split("_", 2)[-1]}
+
+    return {
+        "metadata": data.get("_metadata", {}),
+        "video": video,
+        "comments": comments or [],
+        "transcription": transcription or "",
+        "transcript_segments": segments,
+        "engagement": data.get("engagement", {}),
+    }
+
+
+def iter_video_comments(json_file: str) -> Iterator[Dict]:
+    # Como load_video_file, mas lê comentarios.jsonl e arquivo.jsonl.gz sem carregá-los inteiros
+    data = read_json_file(json_file)
+    if data.get("comments") is not None:
+        yield from data["comments"]
+        return
+
+    comments_file = os.path.join(os.path.dirname(json_file), data.get("comments_file") or "")
+    if not data.get("comments_file") or not os.path.exists(comments_file):
+        return
+    if comments_file.endswith(".gz"):
+        for line in iter_archive(comments_file, (LINE_COMMENT,)):
+            yield line["record"]
+        return
+
+    with open(comments_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize_video_file(json_file: str) -> Dict:
+    record = load_video_file(json_file)
+    folder = os.path.dirname(json_file)
+
+    return {
+        "video_id": record["video"].get("video_id"),
+        "collection": os.path.basename(os.path.dirname(folder)),
+        "folder": folder,
+        "schema_version": record["metadata"].get("schema_version", "1.0"),
+        "mtime": os.path.getmtime(json_file),
+        "comment_count": len(record["comments"]),
+        "reply_count": sum(len(c.get("replies", [])) for c in record["comments"]),
+        "video": record["video"],
+    }
+
+
+def comment_rows(json_file: str) -> Tuple[List[Dict], List[Dict]]:
+    record = load_video_file(json_file)
+    video_id = record["video"].get("video_id")
+    collection = os.path.basename(os.path.dirname(os.path.dirname(json_file)))
+
+    comments = []
+    replies = []
+    for comment in record["comments"]:
+        comments.append({
+            "video_id": video_id,
+            "collection": collection,
+            "comment_id": comment.get("comment_id"),
+            "author": comment.get("author"),
+            "text": comment.get("text"),
+            "like_count": comment.get("like_count"),
+            "published_at": comment.get("published_at"),
+            "reply_count": len(comment.get("replies", [])),
+            "flags": comment.get("flags"),
+        })
+        for reply in comment.get("replies", []):
+            replies.append({
+                "video_id": video_id,
+                "collection": collection,
+                "comment_id": comment.get("comment_id"),
+                "reply_id": reply.get("reply_id"),
+                "author": reply.get("author"),
+                "text": reply.get("text"),
+                "like_count": reply.get("like_count"),
+                "published_at": reply.get("published_at"),
+            })
+
+    return comments, replies
+
+
+def parallel_map(func, items: List, max_workers: Optional[int] = None) -> List:
+    if len(items) < PARALLEL_PARSE_THRESHOLD or max_workers == 1:
+        return [func(item) for item in items]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunksize = max(1, len(items) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(func, items, chunksize=chunksize))
+
+
+class Corpus:
+
+    def __init__(self, base_dir: str = "dados", max_workers: Optional[int] = None):
+        self.base_dir = base_dir
+        self.max_workers = max_workers
+        self.manifest_file = os.path.join(base_dir, MANIFEST_FILE)
+        self.entries: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            manifest = read_json_file(self.manifest_file)
+            if manifest.get("version") != MANIFEST_VERSION:
+                return {}
+            return manifest.get("entries", {})
+        except Exception as e:
+            print(f"Erro ao carregar manifesto do corpus: {e}")
+            return {}
+
+    def _save_manifest(self) -> None:
+        try:
+            tmp_file = f"{self.manifest_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.manifest_file)
+        except Exception as e:
+            print(f"Erro ao salvar manifesto do corpus: {e}")
+
+    def video_files(self) -> List[str]:
+        pattern = os.path.join(self.base_dir, "coleta_*", "video_*", "dados.json")
+        return sorted(glob.glob(pattern))
+
+    def refresh(self) -> int:
+        files = self.video_files()
+        current = {os.path.dirname(path): path for path in files}
+
+        stale = [
+            path for folder, path in current.items()
+            if folder not in self.entries or self.entries[folder]["mtime"] != os.path.getmtime(path)
+        ]
+        removed = [folder for folder in self.entries if folder not in current]
+
+        for folder in removed:
+            del self.entries[folder]
+
+        if stale:
+            print(f"Indexando {len(stale)} vídeos no manifesto do corpus...")
+            for entry in parallel_map(summarize_video_file, stale, self.max_workers):
+                self.entries[entry["folder"]] = entry
+
+        if stale or removed:
+            self._save_manifest()
+
+        return len(stale)
+
+    @property
+    def manifest(self) -> Dict[str, Dict]:
+        latest: Dict[str, Dict] = {}
+        for entry in sorted(self.entries.values(), key=lambda e: e["collection"]):
+            latest[entry["video_id"]] = entry
+        return latest
+
+    def video_ids(self) -> List[str]:
+        return list(self.manifest)
+
+    def video(self, video_id: str) -> Optional[Dict]:
+        entry = self.manifest.get(video_id)
+        if entry is None:
+            return None
+        return load_video_file(os.path.join(entry["folder"], "dados.json"))
+
+    def iter_videos(self) -> Iterator[Dict]:
+        for entry in self.manifest.values():
+            yield load_video_file(os.path.join(entry["folder"], "dados.json"))
+
+    def _latest_files(self) -> List[str]:
+        return [os.path.join(entry["folder"], "dados.json") for entry in self.manifest.values()]
+
+    def videos_frame(self, all_collections: bool = False):
+        import pandas as pd
+
+        entries = self.entries.values() if all_collections else self.manifest.values()
+        rows = [
+            {
+                **entry["video"],
+                "collection": entry["collection"],
+                "schema_version": entry["schema_version"],
+                "collected_comments": entry["comment_count"],
+                "collected_replies": entry["reply_count"],
+            }
+            for entry in entries
+        ]
+        return pd.DataFrame(rows)
+
+    def _comment_frames(self):
+        import pandas as pd
+
+        results = parallel_map(comment_rows, self._latest_files(), self.max_workers)
+        comments = [row for video_comments, _ in results for row in video_comments]
+        replies = [row for _, video_replies in results for row in video_replies]
+        return pd.DataFrame(comments), pd.DataFrame(replies)
+
+    def comments_frame(self):
+        return self._comment_frames()[0]
+
+    def replies_frame(self):
+        return self._comment_frames()[1]
+
+
+def load_corpus(base_dir: str = "dados", max_workers: Optional[int] = None) -> Corpus:
+    corpus = Corpus(base_dir, max_workers)
+    corpus.refresh()
+    return corpus
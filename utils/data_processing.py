@@ -1,18 +1,54 @@
+import csv
+import glob
+import gzip
 import json
 import os
 import re
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
-
-import pandas as pd
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .archive import (
+    ARCHIVE_FILE,
+    LINE_COMMENT,
+    LINE_ENGAGEMENT,
+    LINE_METADATA,
+    LINE_THREAD,
+    LINE_TRANSCRIPT,
+    LINE_VIDEO,
+    open_archive,
+)
+from .corpus import iter_video_comments
+from .metrics import METRICS
+
+SCHEMA_VERSION = '2.0'
+# Incrementar ao mudar flag_comment: o reprocessamento regenera as saídas antigas
+FLAG_RULES_VERSION = '1'
+# Payload gzip de coletas anteriores ao arquivo compactado (lido só pelo reprocessamento)
+PAYLOAD_FILE = "payload.json.gz"
+PAYLOAD_KEYS = ('video_id', 'url', 'video_details', 'comments_data', 'transcript', 'transcription', 'previous_comments')
+
+NEAR_DUPLICATE_FLAG = "near_duplicate"
+
+LARGE_JSON_COMMENTS = 1000
+LEGACY_SHORTS_MAX_SECONDS = 60
+SHORTS_MAX_SECONDS = 180
+
+DURATION_PATTERN = re.compile(r"P(?:(\d+)D)?T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]", flags=re.UNICODE)
+SPAM_PATTERNS = [r"\bme\s+fix[ao]\b", r"\bprimeiro\b", r"\bsegundo\b", r"\bcedoo+\b", r"\bchegamos cedo\b"]
+SPAM_PATTERN = re.compile("|".join(f"(?:{p})" for p in SPAM_PATTERNS), re.IGNORECASE)
+# Trechos que todo casamento de SPAM_PATTERNS contém, já em casefold: sem nenhum deles a regex nem roda.
+# "İ" e "ı" casam com "i" em IGNORECASE mas não viram "i" no casefold
+SPAM_LITERALS = ("fix", "primeiro", "segundo", "cedo")
+SPAM_DOTTED_I = ("\u0130", "\u0131")
 
 
 def iso_duration_to_seconds(duration_iso: str) -> Optional[int]:
     if not duration_iso:
         return None
 
-    pattern = re.compile(r"P(?:(\d+)D)?T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
-    match = pattern.fullmatch(duration_iso)
+    match = DURATION_PATTERN.fullmatch(duration_iso)
     if not match:
         return None
 
@@ -30,18 +66,32 @@ def detect_content_type(url: str, duration_seconds: Optional[int]) -> str:
     if url and "shorts" in url:
         return "short"
 
-    if duration_seconds is not None and duration_seconds <= 60:
+    # watch?v= vem da descoberta pela API, que não diz se o vídeo é um short: desde outubro de 2024
+    # shorts vão até 3 minutos
+    max_seconds = SHORTS_MAX_SECONDS if url and "watch?v=" in url else LEGACY_SHORTS_MAX_SECONDS
+    if duration_seconds is not None and duration_seconds <= max_seconds:
         return "short"
 
     return "video"
 
 
+def might_be_spam(text: str) -> bool:
+    folded = text.casefold()
+    for literal in SPAM_LITERALS:
+        if literal in folded:
+            return True
+    for char in SPAM_DOTTED_I:
+        if char in text:
+            return True
+    return False
+
+
 def flag_comment(text: str) -> List[str]:
     flags: List[str] = []
     if not text or not text.strip():
         return ["empty"]
 
-    clean = re.sub(r"[^\w\s]", "", text, flags=re.UNICODE).strip()
+    clean = PUNCTUATION_PATTERN.sub("", text).strip()
 
     if not clean:
         flags.append("emoji_only")
@@ -53,9 +103,7 @@ def flag_comment(text: str) -> List[str]:
         flags.append("spam")
         return flags
 
-    spam_patterns = [r"\bme\s+fix[ao]\b", r"\bprimeiro\b", r"\bsegundo\b", r"\bcedoo+\b", r"\bchegamos cedo\b"]
-
-    if any(re.search(p, text, re.IGNORECASE) for p in spam_patterns):
+    if might_be_spam(text) and SPAM_PATTERN.search(text):
         flags.append("spam")
         return flags
 
@@ -69,14 +117,15 @@ def flag_comment(text: str) -> List[str]:
     return flags
 
 
-def compute_engagement(video_info: Dict, comments: List[Dict]) -> Dict:
+def flag_comments(texts: Iterable[str]) -> List[List[str]]:
+    return [flag_comment(text) for text in texts]
+
+
+def engagement_from_counts(video_info: Dict, comments_with_replies: int, total_replies: int) -> Dict:
     view_count = video_info.get("view_count") or 0
     like_count = video_info.get("like_count") or 0
     comment_count = video_info.get("comment_count") or 0
 
-    comments_with_replies = sum(1 for c in comments if c.get("replies"))
-    total_replies = sum(len(c.get("replies", [])) for c in comments)
-
     like_view_ratio = round(like_count / view_count, 4) if view_count else None
     comment_view_ratio = round(comment_count / view_count, 6) if view_count else None
 
@@ -88,7 +137,15 @@ def compute_engagement(video_info: Dict, comments: List[Dict]) -> Dict:
     }
 
 
-def extract_comment_data(comment_obj: Dict, replies: List[Dict]) -> Optional[Dict]:
+def compute_engagement(video_info: Dict, comments: List[Dict]) -> Dict:
+    comments_with_replies = sum(1 for c in comments if c.get("replies"))
+    total_replies = sum(len(c.get("replies", [])) for c in comments)
+
+    return engagement_from_counts(video_info, comments_with_replies, total_replies)
+
+
+def extract_comment_data(comment_obj: Dict, replies: List[Dict],
+                         flags: Optional[List[str]] = None) -> Optional[Dict]:
     try:
         comment_snippet = comment_obj.get("snippet", {})
         text = comment_snippet.get("textOriginal", "")
@@ -98,7 +155,7 @@ def extract_comment_data(comment_obj: Dict, replies: List[Dict]) -> Optional[Dic
             "text": text,
             "like_count": (int(comment_snippet["likeCount"]) if "likeCount" in comment_snippet else None),
             "published_at": comment_snippet.get("publishedAt", ""),
-            "flags": flag_comment(text),
+            "flags": flags if flags is not None else flag_comment(text),
             "replies": [],
         }
 
@@ -172,88 +229,306 @@ def structure_comments(comments_data: List[Dict]) -> List[Dict]:
     if not isinstance(comments_data, list) or len(comments_data) == 0:
         return comments_estruturados
 
-    for thread in comments_data:
+    texts = [
+        thread.get('comment', {}).get('snippet', {}).get('textOriginal', '')
+        for thread in comments_data
+    ]
+    all_flags = flag_comments(texts)
+
+    for thread, flags in zip(comments_data, all_flags):
         comment_obj = thread.get('comment', {})
         replies = thread.get('replies', [])
 
-        comment_item = extract_comment_data(comment_obj, replies)
+        comment_item = extract_comment_data(comment_obj, replies, flags)
         if comment_item:
             comments_estruturados.append(comment_item)
 
     return comments_estruturados
 
 
-def save_json(video_info: Dict, comments: List[Dict], transcription: str, video_folder: str) -> None:
+def find_previous_collection(video_id: str, base_dir: str = "dados") -> Optional[str]:
+    pattern = os.path.join(base_dir, "coleta_*", f"video_*_{glob.escape(video_id)}", "dados.json")
+    candidates = [
+        path for path in glob.glob(pattern)
+        if os.path.basename(os.path.dirname(path)).endswith(f"_{video_id}")
+    ]
+    if not candidates:
+        return None
+
+    return max(candidates, key=lambda path: os.path.basename(os.path.dirname(os.path.dirname(path))))
+
+
+def iter_previous_comments(video_id: str, base_dir: str = "dados") -> Iterator[Dict]:
+    json_file = find_previous_collection(video_id, base_dir)
+    if not json_file:
+        return
+
+    try:
+        for comment in iter_video_comments(json_file):
+            if "flags" not in comment:
+                comment["flags"] = flag_comment(comment.get("text", ""))
+            comment.setdefault("replies", [])
+            yield comment
+    except Exception as e:
+        print(f"Erro ao carregar comentários anteriores: {e}")
+
+
+def load_previous_comments(video_id: str, base_dir: str = "dados") -> List[Dict]:
+    return list(iter_previous_comments(video_id, base_dir))
+
+
+def merge_comments(new_comments: List[Dict], previous_comments: List[Dict]) -> List[Dict]:
+    new_ids = {c['comment_id'] for c in new_comments}
+    return new_comments + [c for c in previous_comments if c.get('comment_id') not in new_ids]
+
+
+def mark_near_duplicates(comments: List[Dict], clusters: Optional[Dict[str, str]]) -> None:
+    # clusters: comment_id/reply_id -> cluster_id, vindo de near_duplicates.jsonl
+    if not clusters:
+        return
+
+    for comment in comments:
+        cluster = clusters.get(comment.get('comment_id'))
+        if cluster:
+            if NEAR_DUPLICATE_FLAG not in comment['flags']:
+                comment['flags'] = comment['flags'] + [NEAR_DUPLICATE_FLAG]
+            comment['near_duplicate_cluster'] = cluster
+        for reply in comment.get('replies', []):
+            cluster = clusters.get(reply.get('reply_id'))
+            if cluster:
+                reply['near_duplicate_cluster'] = cluster
+
+
+def build_metadata(collected_at: Optional[str] = None) -> Dict:
+    return {
+        'source': 'youtube_data_api_v3',
+        'collected_at': collected_at or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'schema_version': SCHEMA_VERSION,
+        'flag_rules_version': FLAG_RULES_VERSION,
+    }
+
+
+def build_transcription_block(video_info: Dict, transcription: str, transcript: Optional[Dict] = None) -> Dict:
+    word_count = len(transcription.split()) if transcription and transcription.strip() else 0
+    block = {
+        'text': transcription or '',
+        'language': video_info.get('language', 'unknown'),
+        'source': 'auto_generated',
+        'word_count': word_count,
+        'has_timestamps': False,
+    }
+
+    if transcript and transcript.get('start'):
+        block['language'] = transcript.get('language') or block['language']
+        if transcript.get('is_generated') is False:
+            block['source'] = 'manual'
+        block['has_timestamps'] = True
+        block['segments'] = {
+            'start': transcript['start'],
+            'duration': transcript['duration'],
+            'text': transcript['text'],
+        }
+
+    return block
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", **kwargs):
+    # Grava em arquivo temporário e renomeia: uma interrupção nunca deixa o arquivo final pela metade
+    tmp_file = f"{path}.tmp"
+    try:
+        with open(tmp_file, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def dump_json(data: Dict, path: str, compact: bool = False) -> None:
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        if compact:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def build_video_record(video_data: Dict) -> Dict:
+    video_details = video_data.get('video_details', {})
+    comments_data = video_data.get('comments_data', [])
+    transcription = video_data.get('transcription', '') or ''
+    transcript = video_data.get('transcript')
+
+    video_info = extract_video_info(video_data, video_details)
+    comments = structure_comments(comments_data)
+    if video_data.get('previous_comments'):
+        comments = merge_comments(comments, video_data['previous_comments'])
+    mark_near_duplicates(comments, video_data.get('near_duplicates'))
+
+    return {
+        'metadata': build_metadata(video_data.get('collected_at')),
+        'video': video_info,
+        'comments': comments,
+        'transcription': transcription,
+        'transcript': transcript,
+        'engagement': compute_engagement(video_info, comments),
+        'payload': {key: video_data[key] for key in PAYLOAD_KEYS if key in video_data},
+    }
+
+
+def is_large_record(record: Dict) -> bool:
+    return len(record['comments']) >= LARGE_JSON_COMMENTS
+
+
+def write_json(record: Dict, video_folder: str) -> None:
     try:
-        word_count = len(transcription.split()) if transcription and transcription.strip() else 0
         json_data = {
-            '_metadata': {
-                'source': 'youtube_data_api_v3',
-                'collected_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'schema_version': '2.0',
-            },
-            'video': video_info,
-            'transcription': {
-                'text': transcription or '',
-                'language': video_info.get('language', 'unknown'),
-                'source': 'auto_generated',
-                'word_count': word_count,
-                'has_timestamps': False,
-            },
-            'comments': comments,
-            'engagement': compute_engagement(video_info, comments),
+            '_metadata': record['metadata'],
+            'video': record['video'],
+            'transcription': build_transcription_block(
+                record['video'], record['transcription'], record.get('transcript')
+            ),
+            'comments': record['comments'],
+            'engagement': record['engagement'],
         }
-        json_file = os.path.join(video_folder, "dados.json")
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        dump_json(json_data, os.path.join(video_folder, "dados.json"), compact=is_large_record(record))
+    except Exception as e:
+        print(f"Erro ao salvar JSON: {e}")
+        raise
+
 
+def write_raw_json(record: Dict, video_folder: str) -> None:
+    try:
         json_raw = {
-            'video': video_info,
-            'comments': comments,
-            'transcription': transcription,
+            'video': record['video'],
+            'comments': record['comments'],
+            'transcription': record['transcription'],
         }
-        json_raw_file = os.path.join(video_folder, "dados_raw.json")
-        with open(json_raw_file, "w", encoding="utf-8") as f:
-            json.dump(json_raw, f, indent=2, ensure_ascii=False)
+        dump_json(json_raw, os.path.join(video_folder, "dados_raw.json"), compact=is_large_record(record))
+    except Exception as e:
+        print(f"Erro ao salvar JSON bruto: {e}")
+        raise
 
+
+def flag_counts(comments: List[Dict]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for comment in comments:
+        for flag in comment.get('flags', []):
+            counts[flag] = counts.get(flag, 0) + 1
+    return counts
+
+
+def write_archive(record: Dict, video_folder: str) -> None:
+    # Por comentário: uma linha com o registro estruturado e outra com a thread que veio da API
+    payload = record.get('payload', {})
+    video_id = record['video'].get('video_id') or payload.get('video_id')
+    threads = {
+        thread.get('comment', {}).get('id'): thread
+        for thread in payload.get('comments_data') or []
+    }
+
+    try:
+        with open_archive(os.path.join(video_folder, ARCHIVE_FILE)) as archive:
+            archive.write(LINE_METADATA, **record['metadata'])
+            archive.write(
+                LINE_VIDEO, video_id=video_id, url=payload.get('url', ''),
+                raw=payload.get('video_details'), record=record['video'],
+            )
+            for comment in record['comments']:
+                archive.write(LINE_COMMENT, video_id=video_id, comment_id=comment['comment_id'], record=comment)
+                thread = threads.get(comment['comment_id'])
+                if thread is not None:
+                    archive.write(LINE_THREAD, video_id=video_id, comment_id=comment['comment_id'], thread=thread)
+            archive.write(
+                LINE_TRANSCRIPT, video_id=video_id, raw=payload.get('transcript'), text=record['transcription'],
+            )
+            archive.write(LINE_ENGAGEMENT, video_id=video_id, record=record['engagement'])
+
+        # dados.json vira um cabeçalho pequeno; os comentários ficam só no arquivo compactado
+        json_data = {
+            '_metadata': {**record['metadata'], 'comments_format': 'archive'},
+            'video': record['video'],
+            'transcription': build_transcription_block(
+                record['video'], record['transcription'], record.get('transcript')
+            ),
+            'comments_file': ARCHIVE_FILE,
+            'comment_total': len(record['comments']),
+            'flag_counts': flag_counts(record['comments']),
+            'engagement': record['engagement'],
+        }
+        dump_json(json_data, os.path.join(video_folder, "dados.json"))
     except Exception as e:
-        print(f"Erro ao salvar JSON: {e}")
+        print(f"Erro ao salvar arquivo compactado: {e}")
+        raise
+
+
+def read_payload(video_folder: str) -> Dict:
+    with gzip.open(os.path.join(video_folder, PAYLOAD_FILE), "rb") as f:
+        return json.load(f)
+
+
+def save_json(video_info: Dict, comments: List[Dict], transcription: str, video_folder: str) -> None:
+    record = {
+        'metadata': build_metadata(),
+        'video': video_info,
+        'comments': comments,
+        'transcription': transcription,
+        'engagement': compute_engagement(video_info, comments),
+    }
+    write_json(record, video_folder)
+    write_raw_json(record, video_folder)
+
+
+def txt_header_lines(video_info: Dict, comment_total: int) -> List[str]:
+    lines = ["=" * 60, "INFORMAÇÕES DO VÍDEO", "=" * 60]
+    lines.extend(f"{key}: {value}" for key, value in video_info.items())
+    lines.extend(["", "=" * 60, f"COMENTÁRIOS E RESPOSTAS ({comment_total})", "=" * 60])
+    if not comment_total:
+        lines.append("Nenhum comentário encontrado")
+    return lines
+
+
+def txt_comment_lines(number: int, comment: Dict) -> List[str]:
+    lines = [
+        "",
+        f"Comentário {number}:",
+        f"ID: {comment['comment_id']}",
+        f"Autor: {comment['author']}",
+        f"Texto: {comment['text']}",
+        f"Likes: {comment['like_count']}",
+        f"Data: {comment['published_at']}",
+    ]
+
+    if comment['replies']:
+        lines.extend(["", f"  Respostas ({len(comment['replies'])}):"])
+        for j, reply in enumerate(comment['replies'], 1):
+            lines.append(f"  {j}. {reply['author']}: {reply['text']}")
+            lines.append(f"     Likes: {reply['like_count']} | Data: {reply['published_at']}")
+
+    lines.append("-" * 60)
+    return lines
 
 
 def save_txt(video_info: Dict, comments: List[Dict], video_folder: str) -> None:
     try:
+        lines = txt_header_lines(video_info, len(comments))
+        for i, comment in enumerate(comments, 1):
+            lines.extend(txt_comment_lines(i, comment))
+
         txt_file = os.path.join(video_folder, "dados.txt")
-        with open(txt_file, "w", encoding="utf-8") as f:
-            f.write("=" * 60 + "\n")
-            f.write("INFORMAÇÕES DO VÍDEO\n")
-            f.write("=" * 60 + "\n")
-            for key, value in video_info.items():
-                f.write(f"{key}: {value}\n")
-
-            f.write("\n" + "=" * 60 + "\n")
-            f.write(f"COMENTÁRIOS E RESPOSTAS ({len(comments)})\n")
-            f.write("=" * 60 + "\n")
-
-            if comments:
-                for i, comment in enumerate(comments, 1):
-                    f.write(f"\nComentário {i}:\n")
-                    f.write(f"ID: {comment['comment_id']}\n")
-                    f.write(f"Autor: {comment['author']}\n")
-                    f.write(f"Texto: {comment['text']}\n")
-                    f.write(f"Likes: {comment['like_count']}\n")
-                    f.write(f"Data: {comment['published_at']}\n")
-
-                    if comment['replies']:
-                        f.write(f"\n  Respostas ({len(comment['replies'])}):\n")
-                        for j, reply in enumerate(comment['replies'], 1):
-                            f.write(f"  {j}. {reply['author']}: {reply['text']}\n")
-                            f.write(f"     Likes: {reply['like_count']} | Data: {reply['published_at']}\n")
-
-                    f.write("-" * 60 + "\n")
-            else:
-                f.write("Nenhum comentário encontrado\n")
+        with atomic_open(txt_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
     except Exception as e:
         print(f"Erro ao salvar TXT: {e}")
+        raise
+
+
+def write_csv(path: str, fieldnames: List[str], rows) -> None:
+    with atomic_open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
 
 
 def save_video_csv(video_info: Dict, video_folder: str) -> None:
@@ -261,11 +536,49 @@ def save_video_csv(video_info: Dict, video_folder: str) -> None:
         return
 
     try:
-        df_video = pd.DataFrame([video_info])
         csv_video_file = os.path.join(video_folder, "video.csv")
-        df_video.to_csv(csv_video_file, index=False, encoding='utf-8-sig')
+        write_csv(csv_video_file, list(video_info.keys()), [video_info])
     except Exception as e:
         print(f"Erro ao salvar CSV de vídeo: {e}")
+        raise
+
+
+COMMENT_CSV_FIELDS = ['comment_id', 'author', 'text', 'like_count', 'published_at', 'reply_count']
+REPLY_CSV_FIELDS = [
+    'comment_id',
+    'comment_author',
+    'reply_id',
+    'reply_author',
+    'reply_text',
+    'reply_like_count',
+    'reply_published_at',
+]
+
+
+def comment_csv_row(comment: Dict) -> Dict:
+    return {
+        'comment_id': comment['comment_id'],
+        'author': comment['author'],
+        'text': comment['text'],
+        'like_count': comment['like_count'],
+        'published_at': comment['published_at'],
+        'reply_count': len(comment['replies'])
+    }
+
+
+def reply_csv_rows(comment: Dict) -> List[Dict]:
+    return [
+        {
+            'comment_id': comment['comment_id'],
+            'comment_author': comment['author'],
+            'reply_id': reply['reply_id'],
+            'reply_author': reply['author'],
+            'reply_text': reply['text'],
+            'reply_like_count': reply['like_count'],
+            'reply_published_at': reply['published_at']
+        }
+        for reply in comment['replies']
+    ]
 
 
 def save_comments_csv(comments: List[Dict], video_folder: str) -> None:
@@ -273,48 +586,24 @@ def save_comments_csv(comments: List[Dict], video_folder: str) -> None:
         return
 
     try:
-        comments_csv = []
-        for comment in comments:
-            comments_csv.append({
-                'comment_id': comment['comment_id'],
-                'author': comment['author'],
-                'text': comment['text'],
-                'like_count': comment['like_count'],
-                'published_at': comment['published_at'],
-                'reply_count': len(comment['replies'])
-            })
-
-        if comments_csv:
-            df_comments = pd.DataFrame(comments_csv)
-            csv_comments_file = os.path.join(video_folder, "comentarios.csv")
-            df_comments.to_csv(csv_comments_file, index=False, encoding='utf-8-sig')
+        csv_comments_file = os.path.join(video_folder, "comentarios.csv")
+        write_csv(csv_comments_file, COMMENT_CSV_FIELDS, (comment_csv_row(c) for c in comments))
     except Exception as e:
         print(f"Erro ao salvar CSV de comentários: {e}")
+        raise
 
 
 def save_replies_csv(comments: List[Dict], video_folder: str) -> None:
-    all_replies = []
-    for comment in comments:
-        for reply in comment['replies']:
-            all_replies.append({
-                'comment_id': comment['comment_id'],
-                'comment_author': comment['author'],
-                'reply_id': reply['reply_id'],
-                'reply_author': reply['author'],
-                'reply_text': reply['text'],
-                'reply_like_count': reply['like_count'],
-                'reply_published_at': reply['published_at']
-            })
-
-    if not all_replies:
+    if not any(comment['replies'] for comment in comments):
         return
 
     try:
-        df_replies = pd.DataFrame(all_replies)
         csv_replies_file = os.path.join(video_folder, "respostas.csv")
-        df_replies.to_csv(csv_replies_file, index=False, encoding='utf-8-sig')
+        rows = (row for comment in comments for row in reply_csv_rows(comment))
+        write_csv(csv_replies_file, REPLY_CSV_FIELDS, rows)
     except Exception as e:
         print(f"Erro ao salvar CSV de respostas: {e}")
+        raise
 
 
 def save_transcription(transcription: str, video_folder: str) -> None:
@@ -323,55 +612,130 @@ def save_transcription(transcription: str, video_folder: str) -> None:
 
     try:
         trans_file = os.path.join(video_folder, "transcricao.txt")
-        with open(trans_file, "w", encoding="utf-8") as f:
+        with atomic_open(trans_file, "w", encoding="utf-8") as f:
             f.write(transcription)
     except Exception as e:
         print(f"Erro ao salvar transcrição: {e}")
+        raise
 
 
-def print_summary(video_info: Dict, comments: List[Dict], transcription: str, video_folder: str) -> None:
-    print(f"✓ Dados salvos em: {video_folder}")
-    saved_files = ["dados.json", "dados_raw.json", "dados.txt"]
+def write_csv_outputs(record: Dict, video_folder: str) -> None:
+    save_video_csv(record['video'], video_folder)
+    save_comments_csv(record['comments'], video_folder)
+    save_replies_csv(record['comments'], video_folder)
 
-    if video_info:
-        saved_files.append("video.csv")
 
-    if comments:
-        saved_files.append(f"comentarios.csv ({len(comments)} comentários)")
+# 'archive' antes de 'json': com os dois formatos, o dados.json completo prevalece sobre o cabeçalho
+OUTPUT_WRITERS = {
+    'archive': write_archive,
+    'json': write_json,
+    'raw_json': write_raw_json,
+    'txt': lambda record, folder: save_txt(record['video'], record['comments'], folder),
+    'csv': write_csv_outputs,
+    'transcription': lambda record, folder: save_transcription(record['transcription'], folder),
+}
+DEFAULT_OUTPUT_FORMATS = ('archive', 'txt', 'csv', 'transcription')
 
-    if any(c['replies'] for c in comments):
-        total_respostas = sum(len(c['replies']) for c in comments)
-        saved_files.append(f"respostas.csv ({total_respostas} respostas)")
 
-    if transcription and transcription.strip():
-        saved_files.append("transcricao.txt")
+COLLECTION_FORMATS = ('parquet',)
 
-    for file in saved_files:
-        print(f"  - {file}")
 
+def parse_output_formats(value: Optional[str]) -> Tuple[str, ...]:
+    if not value:
+        return DEFAULT_OUTPUT_FORMATS
+
+    known = set(OUTPUT_WRITERS) | set(COLLECTION_FORMATS)
+    formats = tuple(f.strip() for f in value.split(",") if f.strip())
+    for fmt in formats:
+        if fmt not in known:
+            print(f"Formato de saída desconhecido ignorado: {fmt}")
+    return tuple(f for f in formats if f in known)
 
-def save_video_data(video_data: Dict, video_folder: str) -> None:
-    try:
-        video_details = video_data.get('video_details', {})
-        comments_data = video_data.get('comments_data', [])
-        transcription = video_data.get('transcription', '')
 
-        video_info = extract_video_info(video_data, video_details)
-        comments = structure_comments(comments_data)
+def print_summary(record: Dict, video_folder: str, formats: Iterable[str] = DEFAULT_OUTPUT_FORMATS) -> None:
+    print(f"✓ Dados salvos em: {video_folder}")
+    video_info = record['video']
+    comments = record['comments']
+    transcription = record['transcription']
+    saved_files = []
 
-        if not video_info and not comments and not transcription:
-            print(f"⚠ Nenhum dado coletado para {video_folder}")
+    if 'json' in formats:
+        saved_files.append("dados.json")
+    if 'raw_json' in formats:
+        saved_files.append("dados_raw.json")
+    if 'txt' in formats:
+        saved_files.append("dados.txt")
 
-        save_json(video_info, comments, transcription, video_folder)
-        save_txt(video_info, comments, video_folder)
-        save_video_csv(video_info, video_folder)
-        save_comments_csv(comments, video_folder)
-        save_replies_csv(comments, video_folder)
-        save_transcription(transcription, video_folder)
+    if 'csv' in formats:
+        if video_info:
+            saved_files.append("video.csv")
 
-        print_summary(video_info, comments, transcription, video_folder)
+        if comments:
+            saved_files.append(f"comentarios.csv ({len(comments)} comentários)")
 
+        if record['engagement']['total_replies']:
+            saved_files.append(f"respostas.csv ({record['engagement']['total_replies']} respostas)")
+
+    if 'transcription' in formats and transcription and transcription.strip():
+        saved_files.append("transcricao.txt")
+
+    if 'archive' in formats:
+        saved_files.append(f"{ARCHIVE_FILE} ({len(comments)} comentários e threads da API)")
+        if 'json' not in formats:
+            saved_files.append("dados.json (cabeçalho)")
+
+    if 'parquet' in formats:
+        saved_files.append("dataset parquet (videos, comments, replies)")
+
+    for file in saved_files:
+        print(f"  - {file}")
+
+
+def save_video_data(video_data: Dict, video_folder: str, formats: Optional[Iterable[str]] = None,
+                    dataset_store=None, search_index=None) -> bool:
+    # Falso se algum formato ou o dataset não foi gravado: quem chama não marca o vídeo como concluído
+    formats = tuple(formats) if formats is not None else DEFAULT_OUTPUT_FORMATS
+    try:
+        record = build_video_record(video_data)
     except json.JSONDecodeError as e:
         print(f"Erro ao processar JSON dos dados: {e}")
+        return False
     except Exception as e:
-        print(f"Erro ao salvar dados do vídeo: {e}")
\ No newline at end of file
+        print(f"Erro ao salvar dados do vídeo: {e}")
+        return False
+
+    if not record['video'] and not record['comments'] and not record['transcription']:
+        print(f"⚠ Nenhum dado coletado para {video_folder}")
+
+    saved = True
+    for fmt, writer in OUTPUT_WRITERS.items():
+        if fmt in formats:
+            try:
+                with METRICS.timer(f"save.{fmt}"):
+                    writer(record, video_folder)
+            except Exception:
+                # O writer já informou o erro; os demais formatos ainda são gravados
+                saved = False
+
+    # Vídeo com falha não entra no dataset nem no índice: ao ser coletado de novo, não duplica linhas
+    if not saved:
+        return False
+
+    if dataset_store is not None:
+        try:
+            with METRICS.timer("save.parquet"):
+                dataset_store.append_record(record)
+        except Exception as e:
+            print(f"Erro ao gravar no dataset Parquet: {e}")
+            return False
+
+    if search_index is not None:
+        # O índice de busca é reconstruível (--rebuild): uma falha não invalida o vídeo
+        try:
+            with METRICS.timer("save.search_index"):
+                search_index.index_record(record, video_folder)
+        except Exception as e:
+            print(f"Erro ao indexar {video_folder}: {e}")
+
+    print_summary(record, video_folder, formats)
+    return True
@@ -0,0 +1,249 @@
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DATASET_TABLES = ("videos", "comments", "replies")
+DEFAULT_DATASET_ROOT = os.path.join("dados", "dataset")
+# Limite de linhas em memória: no modo streaming um único vídeo pode ter milhões de comentários
+DEFAULT_MAX_BUFFERED_ROWS = 200000
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("pyarrow é necessário para o formato parquet: pip install pyarrow")
+
+
+def dataset_schemas() -> Dict[str, "pa.Schema"]:
+    require_pyarrow()
+    return {
+        "videos": pa.schema([
+            ("collection_id", pa.string()),
+            ("video_id", pa.string()),
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("description", pa.string()),
+            ("published_at", pa.string()),
+            ("channel_title", pa.string()),
+            ("channel_id", pa.string()),
+            ("view_count", pa.int64()),
+            ("like_count", pa.int64()),
+            ("comment_count", pa.int64()),
+            ("duration_iso", pa.string()),
+            ("duration_seconds", pa.int64()),
+            ("content_type", pa.string()),
+            ("language", pa.string()),
+            ("made_for_kids", pa.bool_()),
+            ("like_view_ratio", pa.float64()),
+            ("comment_view_ratio", pa.float64()),
+            ("comments_with_replies", pa.int64()),
+            ("total_replies", pa.int64()),
+            ("transcription", pa.string()),
+            ("collected_at", pa.string()),
+        ]),
+        "comments": pa.schema([
+            ("collection_id", pa.string()),
+            ("video_id", pa.string()),
+            ("comment_id", pa.string()),
+            ("author", pa.string()),
+            ("text", pa.string()),
+            ("like_count", pa.int64()),
+            ("published_at", pa.string()),
+            ("reply_count", pa.int64()),
+            ("flags", pa.list_(pa.string())),
+        ]),
+        "replies": pa.schema([
+            ("collection_id", pa.string()),
+            ("video_id", pa.string()),
+            ("comment_id", pa.string()),
+            ("reply_id", pa.string()),
+            ("author", pa.string()),
+            ("text", pa.string()),
+            ("like_count", pa.int64()),
+            ("published_at", pa.string()),
+        ]),
+    }
+
+
+def collection_date(collection_id: str) -> str:
+    match = re.search(r"(\d{4})(\d{2})(\d{2})_\d{6}", collection_id or "")
+    if match:
+        return "-".join(match.groups())
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def comment_rows(comment: Dict, video_id: str, collection_id: str) -> Tuple[Dict, List[Dict]]:
+    comment_row = {
+        'collection_id': collection_id,
+        'video_id': video_id,
+        'comment_id': comment['comment_id'],
+        'author': comment['author'],
+        'text': comment['text'],
+        'like_count': comment['like_count'],
+        'published_at': comment['published_at'],
+        'reply_count': len(comment['replies']),
+        'flags': comment.get('flags', []),
+    }
+    reply_rows = [
+        {
+            'collection_id': collection_id,
+            'video_id': video_id,
+            'comment_id': comment['comment_id'],
+            'reply_id': reply['reply_id'],
+            'author': reply['author'],
+            'text': reply['text'],
+            'like_count': reply['like_count'],
+            'published_at': reply['published_at'],
+        }
+        for reply in comment['replies']
+    ]
+    return comment_row, reply_rows
+
+
+def record_rows(record: Dict, collection_id: str) -> Dict[str, List[Dict]]:
+    video_info = record['video']
+    engagement = record['engagement']
+    video_id = video_info.get('video_id')
+
+    videos = []
+    if video_info:
+        videos.append({
+            **{k: v for k, v in video_info.items() if k != 'madeForKids'},
+            'collection_id': collection_id,
+            'made_for_kids': video_info.get('madeForKids'),
+            'like_view_ratio': engagement.get('like_view_ratio'),
+            'comment_view_ratio': engagement.get('comment_view_ratio'),
+            'comments_with_replies': engagement.get('comments_with_replies'),
+            'total_replies': engagement.get('total_replies'),
+            'transcription': record['transcription'],
+            'collected_at': record['metadata'].get('collected_at'),
+        })
+
+    comments = []
+    replies = []
+    for comment in record['comments']:
+        comment_row, reply_rows = comment_rows(comment, video_id, collection_id)
+        comments.append(comment_row)
+        replies.extend(reply_rows)
+
+    return {"videos": videos, "comments": comments, "replies": replies}
+
+
+def run_callbacks(callbacks: List[Callable[[], None]]) -> None:
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Erro após gravar o dataset: {e}")
+
+
+class ParquetDatasetStore:
+
+    def __init__(self, collection_id: str, root: str = DEFAULT_DATASET_ROOT,
+                 flush_every: int = 50, compression: str = "zstd",
+                 max_buffered_rows: int = DEFAULT_MAX_BUFFERED_ROWS):
+        require_pyarrow()
+        self.collection_id = collection_id
+        self.root = root
+        self.flush_every = flush_every
+        self.max_buffered_rows = max_buffered_rows
+        self.compression = compression
+        self.partition = f"collection_date={collection_date(collection_id)}"
+        self._schemas = dataset_schemas()
+        self._buffers: Dict[str, List[Dict]] = {table: [] for table in DATASET_TABLES}
+        self._buffered_videos = 0
+        self._part = self._existing_parts()
+        self._after_flush: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _existing_parts(self) -> int:
+        # Uma coleta retomada continua depois da maior parte já gravada, mesmo com buracos na numeração
+        pattern = re.compile(rf"^part-{re.escape(self.collection_id)}-(\d+)\.parquet$")
+        numbers = [
+            int(match.group(1))
+            for folder in (os.path.join(self.root, table, self.partition) for table in DATASET_TABLES)
+            if os.path.isdir(folder)
+            for match in map(pattern.match, os.listdir(folder))
+            if match
+        ]
+        return max(numbers, default=-1) + 1
+
+    def append_record(self, record: Dict) -> None:
+        rows = record_rows(record, self.collection_id)
+        with self._lock:
+            for table in DATASET_TABLES:
+                self._buffers[table].extend(rows[table])
+            self._buffered_videos += 1
+            callbacks = self._flush_locked() if self._buffered_videos >= self.flush_every else []
+        run_callbacks(callbacks)
+
+    def after_flush(self, callback: Callable[[], None]) -> None:
+        # Chamado quando as linhas já acrescentadas estiverem em disco (na hora, se o buffer está vazio)
+        with self._lock:
+            if any(self._buffers.values()):
+                self._after_flush.append(callback)
+                return
+        callback()
+
+    def append_comments(self, video_id: str, comments: Iterable[Dict]) -> None:
+        # Usado pelo modo streaming; a linha do vídeo entra depois por append_record sem comentários
+        with self._lock:
+            for comment in comments:
+                comment_row, reply_rows = comment_rows(comment, video_id, self.collection_id)
+                self._buffers["comments"].append(comment_row)
+                self._buffers["replies"].extend(reply_rows)
+            full = len(self._buffers["comments"]) + len(self._buffers["replies"]) >= self.max_buffered_rows
+            callbacks = self._flush_locked() if full else []
+        run_callbacks(callbacks)
+
+    def discard_video(self, video_id: str) -> None:
+        # Linhas ainda no buffer de um vídeo interrompido; ao retomar, as páginas do journal voltam inteiras
+        with self._lock:
+            for table in ("comments", "replies"):
+                self._buffers[table] = [row for row in self._buffers[table] if row['video_id'] != video_id]
+
+    def flush(self) -> None:
+        with self._lock:
+            callbacks = self._flush_locked()
+        run_callbacks(callbacks)
+
+    def _flush_locked(self) -> List[Callable[[], None]]:
+        if not any(self._buffers.values()):
+            return []
+
+        for table in DATASET_TABLES:
+            rows = self._buffers[table]
+            if not rows:
+                continue
+
+            folder = os.path.join(self.root, table, self.partition)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"part-{self.collection_id}-{self._part:05d}.parquet")
+            arrow_table = pa.Table.from_pylist(rows, schema=self._schemas[table])
+            pq.write_table(arrow_table, path, compression=self.compression)
+
+        self._buffers = {table: [] for table in DATASET_TABLES}
+        self._buffered_videos = 0
+        self._part += 1
+        callbacks, self._after_flush = self._after_flush, []
+        return callbacks
+
+    def close(self) -> None:
+        self.flush()
+
+
+def read_dataset(table: str, root: str = DEFAULT_DATASET_ROOT, columns: Optional[List[str]] = None,
+                 filters: Optional[List] = None):
+    require_pyarrow()
+    import pandas as pd
+
+    path = os.path.join(root, table)
+    return pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters)
@@ -0,0 +1,204 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+
+from .youtube_api import YoutubeApi
+
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+SHORTS_URL = "https://www.youtube.com/shorts/{}"
+API_PAGE_SIZE = 50
+VIDEO_ID_PATTERN = re.compile(r"(?:/shorts/|[?&]v=|youtu\.be/|/embed/)([A-Za-z0-9_-]{11})")
+BARE_VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+def parse_video_id(value: str) -> Optional[str]:
+    value = value.strip()
+    if BARE_VIDEO_ID_PATTERN.match(value):
+        return value
+    match = VIDEO_ID_PATTERN.search(value)
+    return match.group(1) if match else None
+
+
+def iter_api_items(method_func, endpoint: str, **params) -> Iterator[Dict]:
+    api_youtube = YoutubeApi.get_instance()
+    page_token = None
+
+    while True:
+        response = api_youtube.make_api_request(
+            method_func,
+            endpoint=endpoint,
+            pageToken=page_token,
+            maxResults=API_PAGE_SIZE,
+            **params,
+        )
+        yield from response.get("items", [])
+
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+
+
+class DiscoverySource(ABC):
+
+    name = "base"
+
+    @abstractmethod
+    def video_ids(self) -> Iterator[str]:
+        ...
+
+    def video_url(self, video_id: str) -> str:
+        return WATCH_URL.format(video_id)
+
+    def discover(self, num_videos: int) -> Iterator[Tuple[int, str, str]]:
+        seen = set()
+        if num_videos <= 0:
+            return
+
+        for video_id in self.video_ids():
+            if video_id in seen:
+                continue
+            seen.add(video_id)
+            yield len(seen) - 1, video_id, self.video_url(video_id)
+
+            # Para antes de pedir a próxima página: search.list custa 100 unidades
+            if len(seen) >= num_videos:
+                break
+
+    def close(self) -> None:
+        pass
+
+
+class SearchSource(DiscoverySource):
+
+    name = "search"
+
+    def __init__(self, query: str, order: str = "date", video_duration: Optional[str] = "short",
+                 published_after: Optional[str] = None, region_code: Optional[str] = None):
+        self.query = query
+        self.order = order
+        self.video_duration = video_duration
+        self.published_after = published_after
+        self.region_code = region_code
+
+    def video_ids(self) -> Iterator[str]:
+        method_func = lambda client, **kwargs: client.search().list(**kwargs)
+        items = iter_api_items(
+            method_func,
+            "search.list",
+            part="id",
+            type="video",
+            q=self.query,
+            order=self.order,
+            videoDuration=self.video_duration,
+            publishedAfter=self.published_after,
+            regionCode=self.region_code,
+        )
+        for item in items:
+            video_id = item.get("id", {}).get("videoId")
+            if video_id:
+                yield video_id
+
+
+class PlaylistSource(DiscoverySource):
+
+    name = "playlist"
+
+    def __init__(self, playlist_id: str):
+        self.playlist_id = playlist_id
+
+    def resolve_playlist_id(self) -> Optional[str]:
+        return self.playlist_id
+
+    def video_ids(self) -> Iterator[str]:
+        playlist_id = self.resolve_playlist_id()
+        if not playlist_id:
+            return
+
+        method_func = lambda client, **kwargs: client.playlistItems().list(**kwargs)
+        items = iter_api_items(
+            method_func,
+            "playlistItems.list",
+            part="contentDetails",
+            playlistId=playlist_id,
+        )
+        for item in items:
+            video_id = item.get("contentDetails", {}).get("videoId")
+            if video_id:
+                yield video_id
+
+
+class ChannelUploadsSource(PlaylistSource):
+
+    name = "channel"
+
+    def __init__(self, channel: str):
+        super().__init__(None)
+        self.channel = channel
+
+    def resolve_playlist_id(self) -> Optional[str]:
+        if self.playlist_id:
+            return self.playlist_id
+
+        api_youtube = YoutubeApi.get_instance()
+        method_func = lambda client, **kwargs: client.channels().list(**kwargs)
+        lookup = {"forHandle": self.channel} if self.channel.startswith("@") else {"id": self.channel}
+        response = api_youtube.make_api_request(
+            method_func,
+            endpoint="channels.list",
+            part="contentDetails",
+            **lookup,
+        )
+
+        items = response.get("items", [])
+        if not items:
+            print(f"Canal não encontrado: {self.channel}")
+            return None
+
+        self.playlist_id = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        return self.playlist_id
+
+
+class IdFileSource(DiscoverySource):
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.shorts = set()
+
+    def video_url(self, video_id: str) -> str:
+        # Links /shorts/ do arquivo são mantidos: a URL é o que marca o vídeo como short
+        return SHORTS_URL.format(video_id) if video_id in self.shorts else WATCH_URL.format(video_id)
+
+    def video_ids(self) -> Iterator[str]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                video_id = parse_video_id(line)
+                if video_id:
+                    if "/shorts/" in line:
+                        self.shorts.add(video_id)
+                    yield video_id
+                else:
+                    print(f"Linha ignorada, ID de vídeo inválido: {line}")
+
+
+API_DISCOVERY_SOURCES = {
+    SearchSource.name: SearchSource,
+    PlaylistSource.name: PlaylistSource,
+    ChannelUploadsSource.name: ChannelUploadsSource,
+    IdFileSource.name: IdFileSource,
+}
+
+
+def build_api_source(kind: str, target: str) -> DiscoverySource:
+    if kind not in API_DISCOVERY_SOURCES:
+        raise ValueError(
+            f"Fonte de descoberta desconhecida: {kind} "
+            f"(use {', '.join(API_DISCOVERY_SOURCES)})"
+        )
+    if not target:
+        raise ValueError(f"A fonte de descoberta '{kind}' exige DISCOVERY_TARGET")
+    return API_DISCOVERY_SOURCES[kind](target)
@@ -0,0 +1,218 @@
+import logging
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .metrics import METRICS
+
+# Mesmo logger da coleta: as mensagens vão para logs/coleta_*.log
+logger = logging.getLogger("YoutubeCollector")
+
+CHROME_ARGUMENTS = (
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+    "--blink-settings=imagesEnabled=false",
+    "--window-size=1280,900",
+)
+
+_SESSION_DONE = object()
+
+
+def build_chrome_options(headless: bool = True) -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+    for argument in CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    # Não espera imagens e scripts tardios: basta o DOM para ler a URL do short
+    options.page_load_strategy = "eager"
+    return options
+
+
+def create_driver(headless: bool = True) -> webdriver.Chrome:
+    return webdriver.Chrome(options=build_chrome_options(headless))
+
+
+def shorts_video_id(url: str) -> str:
+    return url.split("/shorts/")[-1].split("?")[0]
+
+
+def wait_page_ready(driver, timeout: float = 10) -> None:
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+    )
+
+
+def wait_url_change(driver, previous_url: str, timeout: float = 10) -> str:
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(lambda d: d.current_url != previous_url)
+    return driver.current_url
+
+
+class SeleniumFeedSource:
+
+    def __init__(self, base_route: str, timeout: float = 10, startup_wait: float = 3,
+                 settle_time: float = 2, driver_factory=None):
+        self.base_route = base_route
+        self.timeout = timeout
+        self.startup_wait = startup_wait
+        self.settle_time = settle_time
+        self.driver_factory = driver_factory or (lambda headless: webdriver.Chrome())
+        self.driver = None
+
+    def start(self) -> None:
+        self.driver = self.driver_factory(False)
+        self.driver.get(self.base_route)
+        if self.startup_wait:
+            time.sleep(self.startup_wait)
+
+    def navigate_to_next_short(self, url_atual: str) -> None:
+        logger.info("Navegando para próximo vídeo...")
+        with METRICS.timer("selenium.navigation"):
+            self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ARROW_DOWN)
+            WebDriverWait(self.driver, self.timeout).until(lambda d: d.current_url != url_atual)
+            if self.settle_time:
+                time.sleep(self.settle_time)
+
+    def discover(self, num_videos: int) -> Iterator[Tuple[int, str, str]]:
+        if self.driver is None:
+            self.start()
+
+        for video_index in range(num_videos):
+            url_atual = self.driver.current_url
+            yield video_index, shorts_video_id(url_atual), url_atual
+
+            if video_index + 1 < num_videos:
+                self.navigate_to_next_short(url_atual)
+
+    def close(self) -> None:
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+class ShortsDriverPool:
+
+    def __init__(self, base_route: str, size: int = 2, headless: bool = True,
+                 timeout: float = 10, max_stalls: int = 3, driver_factory=None):
+        self.base_route = base_route
+        self.size = size
+        self.headless = headless
+        self.timeout = timeout
+        self.max_stalls = max_stalls
+        self.driver_factory = driver_factory or create_driver
+        self.duplicates = 0
+        self._drivers: List = []
+        self._threads: List[threading.Thread] = []
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, size * 4))
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_session(self, session_index: int) -> None:
+        driver = None
+        try:
+            driver = self.driver_factory(self.headless)
+            with self._lock:
+                self._drivers.append(driver)
+
+            driver.get(self.base_route)
+            wait_page_ready(driver, self.timeout)
+            WebDriverWait(driver, self.timeout, poll_frequency=0.1).until(
+                lambda d: "/shorts/" in d.current_url
+            )
+
+            url_atual = driver.current_url
+            stalls = 0
+            while not self._stop.is_set():
+                if not self._put((shorts_video_id(url_atual), url_atual)):
+                    break
+
+                started = time.perf_counter()
+                driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ARROW_DOWN)
+                try:
+                    url_atual = wait_url_change(driver, url_atual, self.timeout)
+                    METRICS.observe("selenium.navigation", time.perf_counter() - started)
+                    stalls = 0
+                except TimeoutException:
+                    METRICS.incr("selenium.navigation_stalls")
+                    stalls += 1
+                    if stalls >= self.max_stalls:
+                        logger.warning(f"Sessão {session_index} parou de avançar no feed")
+                        break
+
+        except (TimeoutException, WebDriverException) as e:
+            logger.error(f"Erro na sessão {session_index} do navegador: {e}")
+        finally:
+            self._put(_SESSION_DONE)
+
+    def start(self) -> None:
+        for session_index in range(self.size):
+            thread = threading.Thread(
+                target=self._run_session,
+                args=(session_index,),
+                name=f"descoberta-{session_index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def discover(self, num_videos: int) -> Iterator[Tuple[int, str, str]]:
+        if not self._threads:
+            self.start()
+
+        seen = set()
+        active_sessions = len(self._threads)
+        video_index = 0
+        try:
+            while video_index < num_videos and active_sessions:
+                item = self._queue.get()
+                if item is _SESSION_DONE:
+                    active_sessions -= 1
+                    continue
+
+                video_id, url_atual = item
+                if video_id in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(video_id)
+
+                yield video_index, video_id, url_atual
+                video_index += 1
+        finally:
+            self._stop.set()
+
+    def close(self, join_timeout: Optional[float] = 5) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(join_timeout)
+
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+JOURNAL_FILE = "journal.jsonl"
+PAGES_DIR = ".paginas"
+
+
+def append_line(path: str, entry: Dict) -> None:
+    # Uma linha por evento, com fsync: uma linha incompleta só pode ser a última e é descartada ao ler
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def iter_lines(path: str) -> Iterator[Dict]:
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def read_lines(path: str) -> List[Dict]:
+    return list(iter_lines(path))
+
+
+class CollectionJournal:
+
+    def __init__(self, collection_folder: str):
+        self.collection_folder = collection_folder
+        self.path = os.path.join(collection_folder, JOURNAL_FILE)
+        self.pages_folder = os.path.join(collection_folder, PAGES_DIR)
+        self._lock = threading.Lock()
+
+        self.videos: Dict[str, Dict] = {}
+        for entry in read_lines(self.path):
+            self._apply(entry)
+
+    def _apply(self, entry: Dict) -> None:
+        video_id = entry["video_id"]
+        if entry["event"] == "started":
+            self.videos[video_id] = {
+                "video_index": entry["video_index"],
+                "video_id": video_id,
+                "url": entry["url"],
+                "status": "started",
+            }
+        elif video_id in self.videos:
+            self.videos[video_id]["status"] = entry["event"]
+
+    def _record(self, event: str, video_id: str, **fields) -> None:
+        entry = {"event": event, "video_id": video_id, "at": time.time(), **fields}
+        with self._lock:
+            append_line(self.path, entry)
+            self._apply(entry)
+
+    def _pages_path(self, video_id: str) -> str:
+        return os.path.join(self.pages_folder, f"{video_id}.jsonl")
+
+    def video_started(self, video_index: int, video_id: str, url: str) -> None:
+        self._record("started", video_id, video_index=video_index, url=url)
+
+    def video_done(self, video_id: str) -> None:
+        self._record("done", video_id)
+        pages_path = self._pages_path(video_id)
+        # Mesmo lock de commit_page: a pasta não some entre o makedirs e a gravação de outro vídeo
+        with self._lock:
+            if os.path.exists(pages_path):
+                os.remove(pages_path)
+            try:
+                os.rmdir(self.pages_folder)
+            except OSError:
+                # Ainda há páginas de outros vídeos (ou a pasta nunca foi criada)
+                pass
+
+    def video_failed(self, video_id: str, error: str) -> None:
+        self._record("failed", video_id, error=error)
+
+    def is_done(self, video_id: str) -> bool:
+        return self.videos.get(video_id, {}).get("status") == "done"
+
+    def completed_ids(self) -> List[str]:
+        return [video_id for video_id, video in self.videos.items() if video["status"] == "done"]
+
+    def pending_videos(self) -> List[Tuple[int, str, str]]:
+        pending = [video for video in self.videos.values() if video["status"] != "done"]
+        return [
+            (video["video_index"], video["video_id"], video["url"])
+            for video in sorted(pending, key=lambda v: v["video_index"])
+        ]
+
+    def next_index(self) -> int:
+        return max((video["video_index"] for video in self.videos.values()), default=-1) + 1
+
+    def commit_page(self, video_id: str, threads: List[Dict], next_page_token: Optional[str]) -> None:
+        with self._lock:
+            os.makedirs(self.pages_folder, exist_ok=True)
+            append_line(self._pages_path(video_id), {"next_page_token": next_page_token, "threads": threads})
+
+    def iter_checkpoint_pages(self, video_id: str) -> Iterator[Dict]:
+        # Uma página por vez: o modo streaming retoma sem carregar todas as páginas salvas
+        return iter_lines(self._pages_path(video_id))
+
+    def comment_checkpoint(self, video_id: str) -> Tuple[List[Dict], Optional[str], bool]:
+        pages = read_lines(self._pages_path(video_id))
+        if not pages:
+            return [], None, False
+
+        threads = [thread for page in pages for thread in page["threads"]]
+        next_page_token = pages[-1]["next_page_token"]
+        return threads, next_page_token, next_page_token is None
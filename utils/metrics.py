@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+METRIC_PREFIX = "yt_collector"
+QUANTILES = (0.5, 0.9, 0.99)
+_INVALID_METRIC_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Interpolação linear entre as posições vizinhas, como numpy.percentile
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def metric_name(name: str) -> str:
+    return f"{METRIC_PREFIX}_{_INVALID_METRIC_CHARS.sub('_', name)}"
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings: Dict[str, List[float]] = {}
+        self._counters: Dict[str, float] = {}
+        self.started_at = time.time()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings = {}
+            self._counters = {}
+            self.started_at = time.time()
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._timings.setdefault(name, []).append(seconds)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def summary(self, name: str) -> Dict:
+        with self._lock:
+            values = sorted(self._timings.get(name, []))
+        total = sum(values)
+        result = {
+            "count": len(values),
+            "total": total,
+            "mean": total / len(values) if values else 0.0,
+            "max": values[-1] if values else 0.0,
+        }
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}"] = percentile(values, q)
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            names = sorted(self._timings)
+        return {
+            "started_at": self.started_at,
+            "elapsed_seconds": time.time() - self.started_at,
+            "counters": counters,
+            "timings": {name: self.summary(name) for name in names},
+        }
+
+    def write_json(self, path: str, extra: Optional[Dict] = None) -> None:
+        data = {**self.snapshot(), **(extra or {})}
+        try:
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            os.replace(tmp_file, path)
+        except Exception as e:
+            print(f"Erro ao salvar métricas JSON: {e}")
+
+    def prometheus_text(self) -> str:
+        snapshot = self.snapshot()
+        summary_name = metric_name("stage_seconds")
+        lines = [
+            f"# HELP {summary_name} Duração das etapas da coleta em segundos",
+            f"# TYPE {summary_name} summary",
+        ]
+        for stage, summary in snapshot["timings"].items():
+            for q in QUANTILES:
+                value = summary[f"p{int(q * 100)}"]
+                lines.append(f'{summary_name}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{summary_name}_sum{{stage="{stage}"}} {summary["total"]:.6f}')
+            lines.append(f'{summary_name}_count{{stage="{stage}"}} {summary["count"]}')
+
+        for name, value in sorted(snapshot["counters"].items()):
+            counter_name = f"{metric_name(name)}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            lines.append(f"{counter_name} {value:g}")
+
+        elapsed_name = metric_name("run_elapsed_seconds")
+        lines.append(f"# TYPE {elapsed_name} gauge")
+        lines.append(f"{elapsed_name} {snapshot['elapsed_seconds']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        try:
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_file, path)
+        except Exception as e:
+            print(f"Erro ao salvar métricas Prometheus: {e}")
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .corpus import load_corpus, load_video_file, parallel_map
+from .data_processing import PUNCTUATION_PATTERN, atomic_open
+
+NEAR_DUPLICATES_FILE = "near_duplicates.jsonl"
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+# Similaridade de Jaccard estimada mínima entre um comentário e o representante do cluster
+SIMILARITY_THRESHOLD = 0.6
+# Comentários curtos ("kkkk", "primeiro") se repetem naturalmente e ficam de fora
+MIN_TEXT_CHARS = 20
+MIN_CLUSTER_SIZE = 3
+MIN_CLUSTER_VIDEOS = 2
+SIGNATURE_BATCH_SIZE = 20000
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    text = PUNCTUATION_PATTERN.sub(" ", (text or "").lower())
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def comment_texts(json_file: str) -> Tuple[str, List[str], List[str]]:
+    record = load_video_file(json_file)
+    ids, texts = [], []
+    for comment in record["comments"]:
+        ids.append(comment.get("comment_id"))
+        texts.append(comment.get("text", ""))
+        # Respostas também entram: redes de bots respondem comentários populares
+        for reply in comment.get("replies", []):
+            ids.append(reply.get("reply_id"))
+            texts.append(reply.get("text", ""))
+    return record["video"].get("video_id"), ids, texts
+
+
+class MinHasher:
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, shingle_size: int = SHINGLE_SIZE,
+                 seed: int = 42):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_permutations = num_permutations
+        self.shingle_size = shingle_size
+        # Hashes h(x) = (a*x + b) mod 2^32, com a ímpar: em uint32 o módulo é o próprio overflow
+        self.a = rng.integers(0, 2 ** 32, num_permutations, dtype=np.uint32) | np.uint32(1)
+        self.b = rng.integers(0, 2 ** 32, num_permutations, dtype=np.uint32)
+
+    def shingle_hashes(self, texts: List[str]):
+        import numpy as np
+
+        k = self.shingle_size
+        # UTF-32: um inteiro por caractere, então os shingles são de caracteres e não de bytes
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        text_starts = np.cumsum(lengths) - lengths
+
+        rolling = np.zeros(max(0, len(codes) - k + 1), dtype=np.uint64)
+        for j in range(k):
+            rolling = rolling * np.uint64(1000003) + codes[j:len(codes) - k + 1 + j]
+        hashes = ((rolling * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.uint32)
+
+        # Só shingles inteiros dentro de cada texto (textos têm pelo menos k caracteres)
+        counts = lengths - k + 1
+        offsets = np.cumsum(counts) - counts
+        positions = np.repeat(text_starts - offsets, counts) + np.arange(counts.sum())
+        return hashes[positions], offsets
+
+    def signatures(self, texts: List[str]):
+        import numpy as np
+
+        hashes, offsets = self.shingle_hashes(texts)
+        signatures = np.empty((self.num_permutations, len(texts)), dtype=np.uint32)
+        values = np.empty_like(hashes)
+        # Uma permutação por vez sobre um buffer reaproveitado: cabe no cache e evita temporários
+        for i in range(self.num_permutations):
+            np.multiply(hashes, self.a[i], out=values)
+            np.add(values, self.b[i], out=values)
+            signatures[i] = np.minimum.reduceat(values, offsets)
+        return signatures.T
+
+
+def lsh_clusters(signatures, bands: int = LSH_BANDS, threshold: float = SIMILARITY_THRESHOLD):
+    import numpy as np
+
+    count, num_permutations = signatures.shape
+    rows = num_permutations // bands
+    coefficients = np.random.default_rng(7).integers(1, 2 ** 63, rows, dtype=np.uint64) | np.uint64(1)
+
+    # Cada banda agrupa assinaturas iguais naquele trecho; os grupos são pré-computados por ordenação
+    band_groups = []
+    for band in range(bands):
+        chunk = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (chunk * coefficients).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        if len(starts) == count:
+            continue
+        group_of = np.empty(count, dtype=np.int64)
+        group_of[order] = np.cumsum(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) - 1
+        band_groups.append((order, starts, group_of))
+
+    # Componentes conexos por propagação do menor rótulo, com salto de ponteiros
+    labels = np.arange(count)
+    while True:
+        previous = labels
+        for order, starts, group_of in band_groups:
+            group_min = np.minimum.reduceat(labels[order], starts)
+            labels = np.minimum(labels, group_min[group_of])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+
+    # Descarta membros pouco parecidos com o representante (falsos positivos e encadeamentos longos)
+    similarity = (signatures == signatures[labels]).mean(axis=1)
+    return np.where(similarity >= threshold, labels, np.arange(count))
+
+
+def cluster_id(representative: str) -> str:
+    return "nd_" + hashlib.sha1(representative.encode("utf-8")).hexdigest()[:12]
+
+
+def find_near_duplicates(rows: List[Tuple[str, str, str]], threshold: float = SIMILARITY_THRESHOLD,
+                         min_cluster_size: int = MIN_CLUSTER_SIZE,
+                         min_cluster_videos: int = MIN_CLUSTER_VIDEOS) -> List[Dict]:
+    import numpy as np
+
+    # Textos idênticos após normalização são assinados uma única vez
+    text_index: Dict[str, int] = {}
+    row_texts = np.full(len(rows), -1, dtype=np.int64)
+    for i, (_, _, text) in enumerate(rows):
+        normalized = normalize_text(text)
+        if len(normalized) >= MIN_TEXT_CHARS:
+            row_texts[i] = text_index.setdefault(normalized, len(text_index))
+
+    unique_texts = list(text_index)
+    if not unique_texts:
+        return []
+
+    hasher = MinHasher()
+    signatures = np.concatenate([
+        hasher.signatures(unique_texts[start:start + SIGNATURE_BATCH_SIZE])
+        for start in range(0, len(unique_texts), SIGNATURE_BATCH_SIZE)
+    ])
+    text_labels = lsh_clusters(signatures, threshold=threshold)
+
+    members: Dict[int, List[int]] = {}
+    for i in np.flatnonzero(row_texts >= 0):
+        members.setdefault(int(text_labels[row_texts[i]]), []).append(int(i))
+
+    assignments = []
+    for label, indexes in members.items():
+        videos = {rows[i][0] for i in indexes}
+        if len(indexes) < min_cluster_size or len(videos) < min_cluster_videos:
+            continue
+        cluster = cluster_id(unique_texts[label])
+        for i in indexes:
+            assignments.append({
+                "video_id": rows[i][0],
+                "comment_id": rows[i][1],
+                "cluster_id": cluster,
+                "cluster_size": len(indexes),
+                "cluster_videos": len(videos),
+            })
+    return assignments
+
+
+def write_near_duplicates(assignments: List[Dict], path: str) -> None:
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        for entry in sorted(assignments, key=lambda e: (e["cluster_id"], e["video_id"], e["comment_id"])):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    # O cache é por mtime; uma regravação no mesmo instante não pode devolver os clusters antigos
+    _read_near_duplicates.cache_clear()
+
+
+@lru_cache(maxsize=4)
+def _read_near_duplicates(path: str, mtime: float) -> Dict[str, Dict[str, str]]:
+    by_video: Dict[str, Dict[str, str]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            by_video.setdefault(entry["video_id"], {})[entry["comment_id"]] = entry["cluster_id"]
+    return by_video
+
+
+def load_near_duplicates(base_dir: str = "dados") -> Dict[str, Dict[str, str]]:
+    path = os.path.join(base_dir, NEAR_DUPLICATES_FILE)
+    if not os.path.exists(path):
+        return {}
+    return _read_near_duplicates(path, os.path.getmtime(path))
+
+
+def detect_near_duplicates(base_dir: str = "dados", threshold: float = SIMILARITY_THRESHOLD,
+                           min_cluster_size: int = MIN_CLUSTER_SIZE, min_cluster_videos: int = MIN_CLUSTER_VIDEOS,
+                           max_workers: Optional[int] = None) -> List[Dict]:
+    corpus = load_corpus(base_dir, max_workers)
+    files = [os.path.join(entry["folder"], "dados.json") for entry in corpus.manifest.values()]
+    rows = [
+        (video_id, comment_id, text)
+        for video_id, ids, texts in parallel_map(comment_texts, files, max_workers)
+        for comment_id, text in zip(ids, texts)
+    ]
+    print(f"Comparando {len(rows)} comentários e respostas de {len(files)} vídeos...")
+
+    assignments = find_near_duplicates(rows, threshold, min_cluster_size, min_cluster_videos)
+    write_near_duplicates(assignments, os.path.join(base_dir, NEAR_DUPLICATES_FILE))
+    return assignments
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .reprocess import reprocess
+    from .search_index import open_search_index
+
+    parser = argparse.ArgumentParser(description="Encontra comentários quase idênticos espalhados por vários vídeos")
+    parser.add_argument("base_dir", nargs="?", default="dados", help="pasta com as coletas (padrão: dados)")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help="similaridade de Jaccard mínima (0 a 1)")
+    parser.add_argument("--min-size", type=int, default=MIN_CLUSTER_SIZE, help="comentários mínimos por cluster")
+    parser.add_argument("--min-videos", type=int, default=MIN_CLUSTER_VIDEOS, help="vídeos distintos mínimos por cluster")
+    parser.add_argument("--workers", type=int, help="processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--no-write-back", action="store_true",
+                        help="só grava near_duplicates.jsonl, sem marcar os comentários nas saídas dos vídeos")
+    args = parser.parse_args(argv)
+
+    # Vídeos marcados na execução anterior: os que saírem dos clusters precisam perder a flag
+    previously_flagged = set(load_near_duplicates(args.base_dir))
+    assignments = detect_near_duplicates(args.base_dir, args.threshold, args.min_size, args.min_videos, args.workers)
+    clusters = {entry["cluster_id"] for entry in assignments}
+    print(f"{len(assignments)} comentários em {len(clusters)} clusters de quase duplicatas")
+    print(f"  - {os.path.join(args.base_dir, NEAR_DUPLICATES_FILE)}")
+
+    if not args.no_write_back:
+        # Regenera as saídas da última coleta de cada vídeo a partir das respostas da API gravadas
+        corpus = load_corpus(args.base_dir, args.workers)
+        video_ids = previously_flagged | {e["video_id"] for e in assignments}
+        folders = [corpus.manifest[video_id]["folder"] for video_id in video_ids if video_id in corpus.manifest]
+        search_index = open_search_index()
+        try:
+            summary = reprocess(args.base_dir, force=True, max_workers=args.workers, folders=folders,
+                                search_index=search_index)
+        finally:
+            if search_index is not None:
+                search_index.close()
+        print(f"  - flag near_duplicate gravada em {summary['atualizado']} vídeos "
+              f"({summary['sem_payload']} sem payload da API)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
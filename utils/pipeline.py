@@ -0,0 +1,113 @@
+import queue
+import threading
+from typing import Callable, Iterable, List, Optional
+
+_STOP = object()
+
+
+class PipelineStage:
+
+    def __init__(self, name: str, func: Callable, workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+
+
+class StagedPipeline:
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 8,
+                 on_error: Optional[Callable] = None):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_error = on_error
+        self._stop_event = threading.Event()
+        self._counter_lock = threading.Lock()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _handle_error(self, stage: PipelineStage, item, error: Exception) -> None:
+        with self._counter_lock:
+            stage.failed += 1
+
+        if self.on_error is not None:
+            self.on_error(stage.name, item, error)
+        else:
+            print(f"Erro no estágio {stage.name}: {error}")
+
+    def _worker(self, stage: PipelineStage, inbox: queue.Queue, outbox: Optional[queue.Queue]) -> None:
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            if self._stop_event.is_set():
+                with self._counter_lock:
+                    stage.dropped += 1
+                continue
+
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self._handle_error(stage, item, e)
+                continue
+
+            with self._counter_lock:
+                stage.processed += 1
+
+            if outbox is not None and result is not None:
+                self._put(outbox, result)
+
+    def run(self, source: Iterable) -> None:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            stage_threads = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[index], outbox),
+                    name=f"{stage.name}-{n}",
+                    daemon=True,
+                )
+                for n in range(stage.workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        try:
+            for item in source:
+                if not self._put(queues[0], item):
+                    break
+        except Exception as e:
+            # Falha da fonte (navegador, paginação da descoberta): para de pegar itens novos, mas os
+            # que já estão nas filas terminam antes de a exceção subir
+            print(f"Fonte do pipeline falhou, concluindo os itens já enfileirados: {e}")
+            raise
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.workers):
+                    queues[index].put(_STOP)
+                for thread in threads[index]:
+                    thread.join()
+
+            dropped = {stage.name: stage.dropped for stage in self.stages if stage.dropped}
+            if dropped:
+                summary = ", ".join(f"{count} em {name}" for name, count in dropped.items())
+                print(f"Pipeline interrompido: itens descartados das filas ({summary})")
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+DEFAULT_DAILY_QUOTA = 10000
+DEFAULT_QUOTA_COST = 1
+QUOTA_COSTS = {
+    "videos.list": 1,
+    "videos.statistics": 1,
+    "commentThreads.list": 1,
+    "commentThreads.latest": 1,
+    "comments.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "search.list": 100,
+}
+
+QUOTA_EXCEEDED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+class QuotaExhaustedError(Exception):
+    pass
+
+
+def quota_cost(endpoint: Optional[str]) -> int:
+    return QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST)
+
+
+def quota_day() -> str:
+    # A cota da YouTube Data API é renovada à meia-noite do horário do Pacífico
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+def key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def get_error_reason(error) -> Optional[str]:
+    try:
+        content = error.content
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        errors = json.loads(content)["error"].get("errors", [])
+        return errors[0].get("reason") if errors else None
+    except Exception:
+        return None
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                missing = (tokens - self._tokens) / self.rate
+
+            time.sleep(missing)
+            waited += missing
+
+
+class QuotaLedger:
+
+    def __init__(self, state_file: Optional[str] = None, daily_limit: int = DEFAULT_DAILY_QUOTA,
+                 save_interval: float = 5.0):
+        self.state_file = state_file
+        self.daily_limit = daily_limit
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._state: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar estado de cota: {e}")
+            return {}
+
+    def _entry(self, api_key: str) -> Dict:
+        fingerprint = key_fingerprint(api_key)
+        today = quota_day()
+        entry = self._state.get(fingerprint)
+        if entry is None or entry.get("day") != today:
+            entry = {"day": today, "spent": 0, "exhausted": False}
+            self._state[fingerprint] = entry
+        return entry
+
+    def spent(self, api_key: str) -> int:
+        with self._lock:
+            return self._entry(api_key)["spent"]
+
+    def remaining(self, api_key: str) -> int:
+        with self._lock:
+            entry = self._entry(api_key)
+            if entry["exhausted"]:
+                return 0
+            return max(0, self.daily_limit - entry["spent"])
+
+    def spend(self, api_key: str, units: int) -> None:
+        with self._lock:
+            self._entry(api_key)["spent"] += units
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def mark_exhausted(self, api_key: str) -> None:
+        with self._lock:
+            self._entry(api_key)["exhausted"] = True
+        self.save()
+
+    def save(self) -> None:
+        if not self.state_file:
+            return
+
+        # Gravação e troca sob o mesmo lock: duas threads não disputam o .tmp e um snapshot
+        # antigo nunca substitui um mais novo
+        with self._lock:
+            self._last_save = time.monotonic()
+            try:
+                tmp_file = f"{self.state_file}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(self._state, f, indent=2)
+                os.replace(tmp_file, self.state_file)
+            except Exception as e:
+                print(f"Erro ao salvar estado de cota: {e}")
+
+
+class KeyRotator:
+
+    def __init__(self, api_keys: List[str], ledger: QuotaLedger):
+        self.api_keys = [key for key in api_keys if key]
+        self.ledger = ledger
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def select(self, cost: int) -> str:
+        with self._lock:
+            for offset in range(len(self.api_keys)):
+                index = (self._index + offset) % len(self.api_keys)
+                api_key = self.api_keys[index]
+                if self.ledger.remaining(api_key) >= cost:
+                    if index != self._index:
+                        print(f"Alternando para chave de API {key_fingerprint(api_key)}")
+                        self._index = index
+                    return api_key
+
+        raise QuotaExhaustedError("Cota diária esgotada em todas as chaves de API")
+
+    def current(self) -> Optional[str]:
+        with self._lock:
+            return self.api_keys[self._index] if self.api_keys else None
+
+    def mark_exhausted(self, api_key: str) -> bool:
+        # Troca sob o lock comparando com a chave da requisição que falhou: threads que falharam com a
+        # mesma chave avançam uma vez só. Falso se outra thread já tinha trocado
+        with self._lock:
+            self.ledger.mark_exhausted(api_key)
+            if not self.api_keys or self.api_keys[self._index] != api_key:
+                return False
+            for offset in range(1, len(self.api_keys)):
+                index = (self._index + offset) % len(self.api_keys)
+                if self.ledger.remaining(self.api_keys[index]) > 0:
+                    print(f"Alternando para chave de API {key_fingerprint(self.api_keys[index])}")
+                    self._index = index
+                    break
+            return True
@@ -0,0 +1,155 @@
+import argparse
+import contextlib
+import glob
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .archive import ARCHIVE_FILE, read_archive_payload
+from .corpus import parallel_map
+from .data_processing import (
+    DEFAULT_OUTPUT_FORMATS,
+    FLAG_RULES_VERSION,
+    OUTPUT_WRITERS,
+    PAYLOAD_FILE,
+    SCHEMA_VERSION,
+    flag_comments,
+    parse_output_formats,
+    read_payload,
+    save_video_data,
+)
+from .near_duplicates import load_near_duplicates
+from .search_index import open_search_index
+
+REPROCESS_FORMATS = DEFAULT_OUTPUT_FORMATS
+# Formatos que gravam dados.json e, com ele, as versões usadas para pular vídeos em dia
+VERSIONED_FORMATS = ('json', 'archive')
+VERSION_PATTERN = re.compile(rb'"(schema_version|flag_rules_version)"\s*:\s*"([^"]*)"')
+METADATA_HEAD_BYTES = 4096
+
+STATUS_UPDATED = "atualizado"
+STATUS_CURRENT = "em_dia"
+STATUS_FAILED = "erro"
+
+
+def find_video_folders(base_dir: str = "dados") -> List[str]:
+    pattern = os.path.join(base_dir, "coleta_*", "video_*")
+    return sorted(folder for folder in glob.glob(pattern) if os.path.isdir(folder))
+
+
+def output_versions(video_folder: str) -> Dict[str, str]:
+    json_file = os.path.join(video_folder, "dados.json")
+    if not os.path.exists(json_file):
+        return {}
+
+    # _metadata é a primeira chave do dados.json: basta ler o começo do arquivo
+    with open(json_file, "rb") as f:
+        head = f.read(METADATA_HEAD_BYTES)
+    return {key.decode(): value.decode() for key, value in VERSION_PATTERN.findall(head)}
+
+
+def find_payload(video_folder: str) -> Optional[str]:
+    for filename in (ARCHIVE_FILE, PAYLOAD_FILE):
+        path = os.path.join(video_folder, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_payload(video_folder: str) -> Dict:
+    # O arquivo é lido inteiro antes de ser regravado pelo writer 'archive'
+    path = find_payload(video_folder)
+    if path.endswith(ARCHIVE_FILE):
+        return read_archive_payload(path)
+    return read_payload(video_folder)
+
+
+def is_current(video_folder: str) -> bool:
+    versions = output_versions(video_folder)
+    return (
+        versions.get("schema_version") == SCHEMA_VERSION
+        and versions.get("flag_rules_version") == FLAG_RULES_VERSION
+    )
+
+
+def reprocess_video(task: Tuple[str, Tuple[str, ...], bool]) -> Tuple[str, str]:
+    video_folder, formats, force = task
+    versioned = any(fmt in formats for fmt in VERSIONED_FORMATS)
+    if not force and versioned and is_current(video_folder):
+        return video_folder, STATUS_CURRENT
+
+    try:
+        video_data = load_payload(video_folder)
+        previous_comments = video_data.get('previous_comments') or []
+        if previous_comments:
+            texts = [comment.get('text', '') for comment in previous_comments]
+            for comment, flags in zip(previous_comments, flag_comments(texts)):
+                comment['flags'] = flags
+
+        base_dir = os.path.dirname(os.path.dirname(video_folder))
+        video_data['near_duplicates'] = load_near_duplicates(base_dir).get(video_data.get('video_id'))
+
+        # save_video_data informa erros no stdout; o resultado vem do retorno e das versões gravadas
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            saved = save_video_data(video_data, video_folder, formats)
+    except Exception as e:
+        print(f"Erro ao reprocessar {video_folder}: {e}")
+        return video_folder, STATUS_FAILED
+
+    if not saved or (versioned and not is_current(video_folder)):
+        return video_folder, STATUS_FAILED
+    return video_folder, STATUS_UPDATED
+
+
+def reprocess(base_dir: str = "dados", formats: Optional[Iterable[str]] = None, force: bool = False,
+              max_workers: Optional[int] = None, folders: Optional[List[str]] = None,
+              search_index=None) -> Dict[str, int]:
+    formats = tuple(formats) if formats is not None else REPROCESS_FORMATS
+    folders = sorted(folders) if folders is not None else find_video_folders(base_dir)
+    with_payload = [f for f in folders if find_payload(f)]
+
+    tasks = [(folder, formats, force) for folder in with_payload]
+    results = parallel_map(reprocess_video, tasks, max_workers)
+
+    summary = {STATUS_UPDATED: 0, STATUS_CURRENT: 0, STATUS_FAILED: 0}
+    for _, status in results:
+        summary[status] += 1
+    summary["sem_payload"] = len(folders) - len(with_payload)
+
+    # O índice de busca é atualizado aqui, em um único processo, a partir das saídas regeneradas
+    if search_index is not None:
+        search_index.index_folders(folder for folder, status in results if status == STATUS_UPDATED)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regenera as saídas dos vídeos a partir dos payloads da API gravados")
+    parser.add_argument("base_dir", nargs="?", default="dados", help="pasta com as coletas (padrão: dados)")
+    parser.add_argument("--formats", help="formatos a regenerar, como em OUTPUT_FORMATS (padrão: todos)")
+    parser.add_argument("--workers", type=int, help="processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--force", action="store_true", help="reprocessa mesmo vídeos já na versão atual")
+    args = parser.parse_args(argv)
+
+    formats = REPROCESS_FORMATS
+    if args.formats:
+        formats = tuple(f for f in parse_output_formats(args.formats) if f in OUTPUT_WRITERS)
+
+    search_index = open_search_index()
+    try:
+        summary = reprocess(args.base_dir, formats, args.force, args.workers, search_index=search_index)
+    finally:
+        if search_index is not None:
+            search_index.close()
+    print(f"Esquema {SCHEMA_VERSION}, regras de flags {FLAG_RULES_VERSION}")
+    print(f"  - {summary[STATUS_UPDATED]} vídeos reprocessados")
+    print(f"  - {summary[STATUS_CURRENT]} já estavam em dia")
+    print(f"  - {summary['sem_payload']} sem payload da API (coletados antes do arquivo compactado)")
+    if summary[STATUS_FAILED]:
+        print(f"  - {summary[STATUS_FAILED]} com erro")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+DEFAULT_CACHE_TTL = 3600
+CACHE_TTLS = {
+    "videos.list": 3600,
+    # Sempre revalidado por ETag: um snapshot de estatísticas não pode vir do cache
+    "videos.statistics": 0,
+    "commentThreads.list": 6 * 3600,
+    # Páginas por order=time (atualização incremental): servidas do cache esconderiam comentários novos
+    "commentThreads.latest": 0,
+    "comments.list": 6 * 3600,
+    "channels.list": 24 * 3600,
+    "playlistItems.list": 3600,
+    "search.list": 3600,
+}
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CachedResponse:
+
+    def __init__(self, response: Dict, etag: Optional[str], fresh: bool):
+        self.response = response
+        self.etag = etag
+        self.fresh = fresh
+
+
+class ResponseCache:
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                etag TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        normalized = {k: v for k, v in params.items() if v is not None}
+        raw = json.dumps({"endpoint": endpoint, "params": normalized}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT endpoint, etag, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            endpoint, etag, body, stored_at = row
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        ttl = self.ttls.get(endpoint, DEFAULT_CACHE_TTL)
+        fresh = time.time() - stored_at < ttl
+        if fresh:
+            self.hits += 1
+        return CachedResponse(json.loads(zlib.decompress(body)), etag, fresh)
+
+    def put(self, key: str, endpoint: str, response: Dict) -> None:
+        body = zlib.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, etag, body, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, response.get("etag"), body, len(body), now, now),
+            )
+            self._conn.commit()
+        self._evict()
+
+    def touch(self, key: str) -> None:
+        now = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+
+            # Libera 10% além do limite para não despejar a cada nova gravação
+            excess = self._total_bytes - int(self.max_bytes * 0.9)
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+            to_delete = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                to_delete.append((key,))
+                excess -= size
+                self._total_bytes -= size
+
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,302 @@
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_SEARCH_INDEX_PATH = os.path.join("dados", "busca.sqlite")
+SEARCH_KINDS = ("comment", "reply", "title", "description", "transcription")
+SNIPPET_TOKENS = 12
+
+
+def collection_of(video_folder: str) -> str:
+    return os.path.basename(os.path.dirname(os.path.abspath(video_folder)))
+
+
+def record_documents(record: Dict) -> List[tuple]:
+    # (comment_id, parent_id, kind, flags, text); título, descrição e transcrição usam comment_id vazio
+    video = record.get("video") or {}
+    documents = [
+        ("", "", "title", "", video.get("title") or ""),
+        ("", "", "description", "", video.get("description") or ""),
+        ("", "", "transcription", "", record.get("transcription") or ""),
+    ]
+    for comment in record.get("comments") or []:
+        comment_id = comment.get("comment_id") or ""
+        # Flags entre vírgulas para o filtro casar o nome inteiro ("spam" não casa "spam_link")
+        flags = "," + ",".join(comment.get("flags") or []) + "," if comment.get("flags") else ""
+        documents.append((comment_id, "", "comment", flags, comment.get("text") or ""))
+        for reply in comment.get("replies") or []:
+            documents.append((reply.get("reply_id") or "", comment_id, "reply", "", reply.get("text") or ""))
+    return [document for document in documents if document[4].strip()]
+
+
+class SearchIndex:
+
+    def __init__(self, path: str = DEFAULT_SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                title TEXT,
+                content_type TEXT,
+                made_for_kids INTEGER
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                comment_id TEXT NOT NULL,
+                parent_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                flags TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_video ON documents (video_id)")
+        # remove_diacritics: "nao" encontra "não", como se digita em comentários
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+            "text, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def document_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _delete_video(self, video_id: str) -> None:
+        self._conn.execute(
+            "DELETE FROM documents_fts WHERE rowid IN (SELECT id FROM documents WHERE video_id = ?)",
+            (video_id,),
+        )
+        self._conn.execute("DELETE FROM documents WHERE video_id = ?", (video_id,))
+
+    def index_record(self, record: Dict, video_folder: str) -> int:
+        video = record.get("video") or {}
+        video_id = video.get("video_id")
+        if not video_id:
+            return 0
+
+        collection = collection_of(video_folder)
+        documents = record_documents(record)
+        made_for_kids = video.get("madeForKids")
+
+        with self._lock:
+            # Cada vídeo aparece uma vez, pela coleta mais recente (como o manifesto do corpus)
+            row = self._conn.execute("SELECT collection FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if row is not None and row[0] > collection:
+                return 0
+
+            with self._conn:
+                self._delete_video(video_id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO videos (video_id, collection, folder, title, content_type, made_for_kids) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        video_id,
+                        collection,
+                        video_folder,
+                        video.get("title"),
+                        video.get("content_type"),
+                        None if made_for_kids is None else int(bool(made_for_kids)),
+                    ),
+                )
+                start = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM documents").fetchone()[0]
+                ids = range(start, start + len(documents))
+                self._conn.executemany(
+                    "INSERT INTO documents (id, video_id, comment_id, parent_id, kind, flags) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(doc_id, video_id, *document[:4]) for doc_id, document in zip(ids, documents)],
+                )
+                self._conn.executemany(
+                    "INSERT INTO documents_fts (rowid, text) VALUES (?, ?)",
+                    [(doc_id, document[4]) for doc_id, document in zip(ids, documents)],
+                )
+        return len(documents)
+
+    def index_folder(self, video_folder: str) -> int:
+        from .corpus import load_video_file
+
+        json_file = os.path.join(video_folder, "dados.json")
+        if not os.path.exists(json_file):
+            return 0
+        return self.index_record(load_video_file(json_file), video_folder)
+
+    def index_folders(self, folders: Iterable[str]) -> int:
+        indexed = 0
+        for folder in folders:
+            try:
+                self.index_folder(folder)
+                indexed += 1
+            except Exception as e:
+                print(f"Erro ao indexar {folder}: {e}")
+        return indexed
+
+    def rebuild(self, base_dir: str = "dados") -> int:
+        from .corpus import load_corpus
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM documents_fts")
+                self._conn.execute("DELETE FROM documents")
+                self._conn.execute("DELETE FROM videos")
+        folders = [entry["folder"] for entry in load_corpus(base_dir).manifest.values()]
+        indexed = self.index_folders(folders)
+        with self._lock:
+            self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+            self._conn.commit()
+        return indexed
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, flags: Optional[Iterable[str]] = None,
+               content_type: Optional[str] = None, made_for_kids: Optional[bool] = None,
+               video_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        # `query` usa a sintaxe do FTS5: termos, "frase exata", prefixo*, OR, NOT, NEAR(...)
+        conditions = ["documents_fts MATCH ?"]
+        params: List = [query]
+        if kinds:
+            kinds = list(kinds)
+            conditions.append(f"d.kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        for flag in flags or []:
+            conditions.append("instr(d.flags, ?) > 0")
+            params.append(f",{flag},")
+        if content_type is not None:
+            conditions.append("v.content_type = ?")
+            params.append(content_type)
+        if made_for_kids is not None:
+            conditions.append("v.made_for_kids = ?")
+            params.append(int(made_for_kids))
+        if video_id is not None:
+            conditions.append("d.video_id = ?")
+            params.append(video_id)
+        # bm25 é calculado para todos os textos que casam, mas snippet e os JOINs só para os `limit` melhores
+        joins = ""
+        if len(conditions) > 1:
+            joins = "JOIN documents d ON d.id = documents_fts.rowid JOIN videos v ON v.video_id = d.video_id "
+        params.extend([limit, query])
+
+        with self._lock:
+            rows = self._conn.execute(
+                "WITH top AS MATERIALIZED ("
+                "SELECT documents_fts.rowid AS id, bm25(documents_fts) AS score FROM documents_fts "
+                f"{joins}WHERE {' AND '.join(conditions)} ORDER BY score LIMIT ?) "
+                "SELECT d.video_id, d.comment_id, d.parent_id, d.kind, d.flags, v.title, v.content_type, "
+                "v.made_for_kids, v.folder, top.score, "
+                f"snippet(documents_fts, 0, '[', ']', '…', {SNIPPET_TOKENS}) "
+                "FROM top "
+                "CROSS JOIN documents_fts ON documents_fts.rowid = top.id "
+                "JOIN documents d ON d.id = top.id "
+                "JOIN videos v ON v.video_id = d.video_id "
+                "WHERE documents_fts MATCH ? ORDER BY top.score",
+                params,
+            ).fetchall()
+
+        return [
+            {
+                "video_id": video_id,
+                "comment_id": comment_id or None,
+                "parent_id": parent_id or None,
+                "kind": kind,
+                "flags": [flag for flag in flags.split(",") if flag],
+                "title": title,
+                "content_type": content_type,
+                "madeForKids": None if made_for_kids is None else bool(made_for_kids),
+                "folder": folder,
+                # bm25 do SQLite é negativo: quanto menor, mais relevante
+                "score": round(-score, 4),
+                "snippet": snippet,
+            }
+            for video_id, comment_id, parent_id, kind, flags, title, content_type, made_for_kids, folder, score, snippet
+            in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_search_index() -> Optional[SearchIndex]:
+    # Mesmas variáveis do main.py: o índice é atualizado por padrão
+    if os.getenv("SEARCH_INDEX", "1") != "1":
+        return None
+    return SearchIndex(os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH))
+
+
+def parse_made_for_kids(value: Optional[str]) -> Optional[bool]:
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "sim")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Busca textual em comentários, respostas, títulos, descrições e transcrições")
+    parser.add_argument("query", nargs="?", help='consulta FTS5: termos, "frase exata", prefixo*, OR, NOT')
+    parser.add_argument("--rebuild", action="store_true", help="recria o índice a partir das coletas em BASE_DIR")
+    parser.add_argument("--base-dir", default="dados", help="pasta com as coletas (padrão: dados)")
+    parser.add_argument("--index", default=os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH))
+    parser.add_argument("--kind", action="append", choices=SEARCH_KINDS, help="tipo de texto (pode repetir)")
+    parser.add_argument("--flag", action="append", help="só comentários com a flag (pode repetir)")
+    parser.add_argument("--content-type", help="short ou video")
+    parser.add_argument("--made-for-kids", help="1 ou 0")
+    parser.add_argument("--video-id")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if not args.rebuild and not args.query:
+        parser.error("informe uma consulta ou --rebuild")
+
+    index = SearchIndex(args.index)
+    try:
+        if args.rebuild:
+            indexed = index.rebuild(args.base_dir)
+            print(f"{indexed} vídeos indexados ({index.document_count()} textos) em {args.index}")
+            if not args.query:
+                return 0
+
+        try:
+            results = index.search(
+                args.query,
+                kinds=args.kind,
+                flags=args.flag,
+                content_type=args.content_type,
+                made_for_kids=parse_made_for_kids(args.made_for_kids),
+                video_id=args.video_id,
+                limit=args.limit,
+            )
+        except sqlite3.OperationalError as e:
+            print(f"Consulta inválida: {e}")
+            return 1
+
+        for result in results:
+            target = result["comment_id"] or result["kind"]
+            flags = f" [{', '.join(result['flags'])}]" if result["flags"] else ""
+            print(f"{result['score']:>8.2f}  {result['video_id']} {target}{flags}")
+            print(f"          {result['snippet']}")
+        print(f"{len(results)} resultados")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
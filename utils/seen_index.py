@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+SEEN_POLICIES = ("off", "skip", "stats")
+DEFAULT_SEEN_INDEX_PATH = os.path.join(".cache", "seen_videos.sqlite")
+
+ACTION_COLLECT = "collect"
+ACTION_SKIP = "skip"
+ACTION_STATS = "stats"
+
+
+class SeenVideoIndex:
+
+    def __init__(self, path: str = DEFAULT_SEEN_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_videos (
+                video_id TEXT PRIMARY KEY,
+                collection TEXT,
+                folder TEXT,
+                first_seen REAL NOT NULL,
+                last_collected REAL NOT NULL,
+                last_stats REAL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_videos").fetchone()[0]
+
+    def __contains__(self, video_id: str) -> bool:
+        return self.get(video_id) is not None
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT collection, folder, first_seen, last_collected, last_stats "
+                "FROM seen_videos WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        collection, folder, first_seen, last_collected, last_stats = row
+        return {
+            "video_id": video_id,
+            "collection": collection,
+            "folder": folder,
+            "first_seen": first_seen,
+            "last_collected": last_collected,
+            "last_stats": last_stats,
+        }
+
+    def video_ids(self, max_age_days: float = 0) -> List[str]:
+        query = "SELECT video_id FROM seen_videos"
+        params = ()
+        if max_age_days > 0:
+            query += " WHERE first_seen >= ?"
+            params = (time.time() - max_age_days * 86400,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY first_seen", params).fetchall()
+        return [video_id for (video_id,) in rows]
+
+    def decide(self, video_id: str, policy: str, max_age_days: float = 0) -> str:
+        if policy not in SEEN_POLICIES or policy == "off":
+            return ACTION_COLLECT
+
+        entry = self.get(video_id)
+        if entry is None:
+            return ACTION_COLLECT
+        if max_age_days and time.time() - entry["last_collected"] > max_age_days * 86400:
+            return ACTION_COLLECT
+
+        return ACTION_STATS if policy == "stats" else ACTION_SKIP
+
+    def mark_collected(self, video_id: str, collection: str, folder: str,
+                       collected_at: Optional[float] = None) -> None:
+        now = collected_at if collected_at is not None else time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO seen_videos (video_id, collection, folder, first_seen, last_collected) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET collection = excluded.collection, "
+                "folder = excluded.folder, last_collected = MAX(last_collected, excluded.last_collected)",
+                (video_id, collection, folder, now, now),
+            )
+            self._conn.commit()
+
+    def record_stats(self, video_id: str) -> None:
+        # Só a data da atualização: os snapshots ficam na série de StatsSeriesStore
+        with self._lock:
+            self._conn.execute("UPDATE seen_videos SET last_stats = ? WHERE video_id = ?", (time.time(), video_id))
+            self._conn.commit()
+
+    def import_entries(self, entries: Iterable[Dict]) -> int:
+        imported = 0
+        for entry in sorted(entries, key=lambda e: e.get("mtime") or 0):
+            if not entry.get("video_id"):
+                continue
+            self.mark_collected(
+                entry["video_id"],
+                entry["collection"],
+                entry["folder"],
+                collected_at=entry.get("mtime"),
+            )
+            imported += 1
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from .corpus import load_corpus
+from .discovery import IdFileSource
+from .metrics import METRICS
+from .seen_index import DEFAULT_SEEN_INDEX_PATH, SeenVideoIndex
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem trava entre processos
+    fcntl = None
+
+load_dotenv()
+
+STATS_FIELDS = ("view_count", "like_count", "comment_count")
+DEFAULT_STATS_STORE_PATH = os.path.join("dados", "estatisticas.jsonl")
+# 10 mil vídeos = 200 unidades de cota por rodada
+DEFAULT_REFRESH_INTERVAL = 12 * 3600
+
+
+class StatsSeriesStore:
+    # Cada linha: [video_id, timestamp, Δviews, Δlikes, Δcomentários] em relação ao snapshot anterior
+    # do mesmo vídeo (o primeiro é absoluto); null quando a contagem está oculta.
+    # A coleta e o stats_refresher gravam no mesmo arquivo: cada append trava o arquivo e lê antes as
+    # linhas que os outros processos acrescentaram, para o delta partir do último valor gravado.
+
+    def __init__(self, path: str = DEFAULT_STATS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last: Dict[str, List[Optional[int]]] = {}
+        self._offset = 0
+        self.snapshot_count = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self._catch_up(f)
+
+    def _remember(self, video_id: str, stats: Dict) -> None:
+        # Guarda o último valor conhecido de cada campo, como faz a decodificação dos deltas
+        previous = self._last.get(video_id) or [None] * len(STATS_FIELDS)
+        self._last[video_id] = [
+            stats.get(field) if stats.get(field) is not None else previous[i]
+            for i, field in enumerate(STATS_FIELDS)
+        ]
+
+    def _catch_up(self, f) -> None:
+        f.seek(self._offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Linha ainda sendo gravada (ou de uma gravação interrompida): fica para depois
+                break
+            self._offset += len(line)
+            try:
+                video_id, _, *deltas = json.loads(line)
+            except ValueError:
+                continue
+            previous = self._last.get(video_id) or [None] * len(STATS_FIELDS)
+            self._last[video_id] = [
+                previous[i] if delta is None else (previous[i] or 0) + delta
+                for i, delta in enumerate(deltas)
+            ]
+            self.snapshot_count += 1
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def _read_rows(self) -> Iterator[List]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha incompleta de uma gravação interrompida
+                    continue
+
+    def iter_snapshots(self) -> Iterator[Dict]:
+        last: Dict[str, List[int]] = {}
+        for video_id, taken_at, *deltas in self._read_rows():
+            values = last.setdefault(video_id, [0] * len(STATS_FIELDS))
+            snapshot = {"video_id": video_id, "taken_at": taken_at}
+            for i, (field, delta) in enumerate(zip(STATS_FIELDS, deltas)):
+                if delta is None:
+                    snapshot[field] = None
+                else:
+                    values[i] += delta
+                    snapshot[field] = values[i]
+            yield snapshot
+
+    def series(self, video_id: str) -> List[Dict]:
+        return [snapshot for snapshot in self.iter_snapshots() if snapshot["video_id"] == video_id]
+
+    def latest(self, video_id: str) -> Optional[Dict]:
+        values = self._last.get(video_id)
+        if values is None:
+            return None
+        return dict(zip(STATS_FIELDS, values))
+
+    def append(self, statistics: Dict[str, Dict], taken_at: Optional[float] = None) -> int:
+        taken_at = int(taken_at if taken_at is not None else time.time())
+        with self._lock, open(self.path, "ab+") as f:
+            if fcntl is not None:
+                # Liberada ao fechar o arquivo
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            self._catch_up(f)
+
+            lines = []
+            for video_id, stats in statistics.items():
+                previous = self._last.get(video_id) or [None] * len(STATS_FIELDS)
+                # Contagens ocultas viram null; o próximo valor conhecido é relativo ao último conhecido
+                deltas = [
+                    None if stats.get(field) is None else stats[field] - (previous[i] or 0)
+                    for i, field in enumerate(STATS_FIELDS)
+                ]
+                self._remember(video_id, stats)
+                lines.append(json.dumps([video_id, taken_at, *deltas], separators=(",", ":")))
+
+            if lines:
+                f.seek(0, os.SEEK_END)
+                # Encerra a linha incompleta de uma gravação interrompida; a leitura a ignora
+                prefix = "\n" if f.tell() > self._offset else ""
+                f.write((prefix + "\n".join(lines) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+                self.snapshot_count += len(lines)
+        return len(lines)
+
+    def frame(self):
+        import pandas as pd
+
+        snapshots = pd.DataFrame(list(self.iter_snapshots()), columns=["video_id", "taken_at", *STATS_FIELDS])
+        snapshots["taken_at"] = pd.to_datetime(snapshots["taken_at"], unit="s", utc=True)
+        return snapshots
+
+
+def engagement_over_time(snapshots):
+    # Mesmas razões de engagement_from_counts, por snapshot, mais o crescimento entre snapshots
+    import pandas as pd
+
+    frame = snapshots.sort_values(["video_id", "taken_at"]).reset_index(drop=True)
+    views = frame["view_count"].astype("float64")
+    has_views = views > 0
+    frame["like_view_ratio"] = (frame["like_count"] / views).where(has_views).round(4)
+    frame["comment_view_ratio"] = (frame["comment_count"] / views).where(has_views).round(6)
+
+    grouped = frame.groupby("video_id", sort=False)
+    hours = grouped["taken_at"].diff() / pd.Timedelta(hours=1)
+    for field in STATS_FIELDS:
+        frame[f"{field}_per_hour"] = grouped[field].diff() / hours
+    return frame
+
+
+class StatsRefresher:
+
+    def __init__(self, store: StatsSeriesStore, video_ids_source: Callable[[], List[str]],
+                 interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.store = store
+        self.video_ids_source = video_ids_source
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def refresh_once(self) -> Dict[str, int]:
+        from .youtube_api import get_video_statistics_many
+
+        video_ids = list(dict.fromkeys(self.video_ids_source()))
+        with METRICS.timer("stats.refresh"):
+            results = get_video_statistics_many(video_ids)
+
+        statistics = {video_id: stats for video_id, stats in results.items() if "error" not in stats}
+        written = self.store.append(statistics)
+        errors = sum(1 for stats in results.values() if "error" in stats)
+        return {
+            "videos": len(video_ids),
+            "snapshots": written,
+            "erros": errors,
+            # IDs ausentes da resposta: vídeos removidos ou privados
+            "indisponiveis": len(video_ids) - written - errors,
+        }
+
+    def run(self, max_rounds: Optional[int] = None) -> None:
+        rounds = 0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            summary = self.refresh_once()
+            rounds += 1
+            print(
+                f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {summary['snapshots']}/{summary['videos']} vídeos "
+                f"atualizados ({summary['indisponiveis']} indisponíveis, {summary['erros']} com erro)",
+                flush=True,
+            )
+            if max_rounds is not None and rounds >= max_rounds:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def tracked_video_ids(seen_index_path: str = DEFAULT_SEEN_INDEX_PATH, max_age_days: float = 0,
+                      ids_file: Optional[str] = None, base_dir: str = "dados") -> Callable[[], List[str]]:
+    def source() -> List[str]:
+        if ids_file:
+            return list(IdFileSource(ids_file).video_ids())
+
+        seen_index = SeenVideoIndex(seen_index_path)
+        try:
+            if len(seen_index) == 0:
+                seen_index.import_entries(load_corpus(base_dir).entries.values())
+            return seen_index.video_ids(max_age_days)
+        finally:
+            seen_index.close()
+
+    return source
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Acompanha views, likes e comentários dos vídeos já coletados")
+    parser.add_argument("--interval", type=float,
+                        default=float(os.getenv("STATS_REFRESH_INTERVAL", str(DEFAULT_REFRESH_INTERVAL))),
+                        help="segundos entre atualizações")
+    parser.add_argument("--once", action="store_true", help="faz uma única atualização e sai")
+    parser.add_argument("--max-age-days", type=float, default=float(os.getenv("STATS_MAX_AGE_DAYS", "0")),
+                        help="acompanha só vídeos vistos pela primeira vez nos últimos N dias (0 = todos)")
+    parser.add_argument("--ids-file", help="arquivo com IDs/URLs em vez do índice de vídeos vistos")
+    parser.add_argument("--store", default=os.getenv("STATS_STORE_PATH", DEFAULT_STATS_STORE_PATH))
+    parser.add_argument("--seen-index", default=os.getenv("SEEN_INDEX_PATH", DEFAULT_SEEN_INDEX_PATH))
+    parser.add_argument("--export", help="grava as séries com as razões de engajamento em CSV e sai")
+    args = parser.parse_args(argv)
+
+    store = StatsSeriesStore(args.store)
+    if args.export:
+        frame = engagement_over_time(store.frame())
+        frame.to_csv(args.export, index=False)
+        print(f"{len(frame)} snapshots de {frame['video_id'].nunique()} vídeos exportados para {args.export}")
+        return 0
+
+    refresher = StatsRefresher(
+        store,
+        tracked_video_ids(args.seen_index, args.max_age_days, args.ids_file),
+        args.interval,
+    )
+    try:
+        refresher.run(max_rounds=1 if args.once else None)
+    except KeyboardInterrupt:
+        print("Atualização de estatísticas interrompida")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+from typing import Dict, Iterable, List, Optional
+
+from .archive import (
+    ARCHIVE_COMPRESS_LEVEL,
+    ARCHIVE_FILE,
+    LINE_COMMENT,
+    LINE_ENGAGEMENT,
+    LINE_METADATA,
+    LINE_THREAD,
+    LINE_TRANSCRIPT,
+    LINE_VIDEO,
+    ArchiveWriter,
+)
+from .data_processing import (
+    COMMENT_CSV_FIELDS,
+    DEFAULT_OUTPUT_FORMATS,
+    REPLY_CSV_FIELDS,
+    atomic_open,
+    build_metadata,
+    build_transcription_block,
+    comment_csv_row,
+    engagement_from_counts,
+    extract_comment_data,
+    reply_csv_rows,
+    save_transcription,
+    save_video_csv,
+    txt_comment_lines,
+    txt_header_lines,
+)
+
+# Formatos que precisam do vídeo inteiro em memória e não têm equivalente em streaming
+UNSUPPORTED_STREAMING_FORMATS = ('raw_json',)
+
+
+class StreamingCommentSink:
+
+    COMMENTS_JSONL = "comentarios.jsonl"
+    COMMENTS_CSV = "comentarios.csv"
+    REPLIES_CSV = "respostas.csv"
+    TXT_FILE = "dados.txt"
+
+    def __init__(self, video_folder: str, video_id: Optional[str] = None,
+                 formats: Iterable[str] = DEFAULT_OUTPUT_FORMATS, dataset_store=None):
+        self.video_folder = video_folder
+        self.video_id = video_id
+        self.formats = tuple(formats)
+        self.dataset_store = dataset_store
+        self.metadata = build_metadata()
+        self.total_comments = 0
+        self.comments_with_replies = 0
+        self.total_replies = 0
+        self.flag_counts: Dict[str, int] = {}
+
+        self._files = []
+        self._archive = None
+        self._jsonl_file = None
+        self._comments_writer = None
+        self._replies_writer = None
+        self._txt_body = None
+
+        # Com 'archive' os comentários e as threads da API vão para o arquivo compactado
+        # (reprocessável); sem ele, 'json' grava comentarios.jsonl
+        if 'archive' in self.formats:
+            archive_file = self._open(f"{ARCHIVE_FILE}.tmp", "wb")
+            archive_gzip = gzip.GzipFile(fileobj=archive_file, mode="wb",
+                                         compresslevel=ARCHIVE_COMPRESS_LEVEL, mtime=0)
+            self._files.insert(0, archive_gzip)
+            self._archive = ArchiveWriter(archive_gzip)
+            self._archive.write(LINE_METADATA, **self.metadata)
+        elif 'json' in self.formats:
+            self._jsonl_file = self._open(self.COMMENTS_JSONL, "w", encoding="utf-8")
+
+        if 'csv' in self.formats:
+            comments_file = self._open(self.COMMENTS_CSV, "w", encoding="utf-8-sig", newline="")
+            replies_file = self._open(self.REPLIES_CSV, "w", encoding="utf-8-sig", newline="")
+            self._comments_writer = csv.DictWriter(comments_file, fieldnames=COMMENT_CSV_FIELDS, lineterminator="\n")
+            self._replies_writer = csv.DictWriter(replies_file, fieldnames=REPLY_CSV_FIELDS, lineterminator="\n")
+            self._comments_writer.writeheader()
+            self._replies_writer.writeheader()
+
+        # O cabeçalho do dados.txt traz o total de comentários: o corpo é gravado à parte e juntado no fim
+        if 'txt' in self.formats:
+            self._txt_body = self._open(f"{self.TXT_FILE}.comentarios.tmp", "w", encoding="utf-8")
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.video_folder, filename)
+
+    def _open(self, filename: str, mode: str, **kwargs):
+        f = open(self._path(filename), mode, **kwargs)
+        self._files.append(f)
+        return f
+
+    def write_comment(self, comment: Dict, thread: Optional[Dict] = None) -> None:
+        if self._archive is not None:
+            self._archive.write(LINE_COMMENT, video_id=self.video_id, comment_id=comment['comment_id'], record=comment)
+            if thread is not None:
+                self._archive.write(LINE_THREAD, video_id=self.video_id,
+                                    comment_id=comment['comment_id'], thread=thread)
+        elif self._jsonl_file is not None:
+            self._jsonl_file.write(json.dumps(comment, ensure_ascii=False) + "\n")
+        if self._comments_writer is not None:
+            self._comments_writer.writerow(comment_csv_row(comment))
+            self._replies_writer.writerows(reply_csv_rows(comment))
+
+        self.total_comments += 1
+        if self._txt_body is not None:
+            self._txt_body.write("\n".join(txt_comment_lines(self.total_comments, comment)) + "\n")
+        if comment['replies']:
+            self.comments_with_replies += 1
+            self.total_replies += len(comment['replies'])
+        for flag in comment.get('flags', []):
+            self.flag_counts[flag] = self.flag_counts.get(flag, 0) + 1
+
+    def write_comments(self, comments: Iterable[Dict]) -> None:
+        batch = []
+        for comment in comments:
+            self.write_comment(comment)
+            batch.append(comment)
+            if len(batch) >= 1000:
+                self._append_dataset(batch)
+                batch = []
+        self._append_dataset(batch)
+
+    def write_threads(self, threads: List[Dict]) -> List[str]:
+        written = []
+        for thread in threads:
+            comment = extract_comment_data(thread.get('comment', {}), thread.get('replies', []))
+            if comment:
+                self.write_comment(comment, thread)
+                written.append(comment)
+
+        self._append_dataset(written)
+        if self._jsonl_file is not None:
+            self._jsonl_file.flush()
+        return [comment['comment_id'] for comment in written]
+
+    def _append_dataset(self, comments: List[Dict]) -> None:
+        if self.dataset_store is not None and comments:
+            self.dataset_store.append_comments(self.video_id, comments)
+
+    def _close_files(self) -> None:
+        for f in self._files:
+            if not f.closed:
+                f.close()
+
+        for filename, total in ((self.COMMENTS_CSV, self.total_comments), (self.REPLIES_CSV, self.total_replies)):
+            if total == 0 and os.path.exists(self._path(filename)):
+                os.remove(self._path(filename))
+
+    def close(self, video_info: Dict, transcription: str, transcript: Optional[Dict] = None,
+              video_details: Optional[Dict] = None, url: str = "") -> None:
+        engagement = engagement_from_counts(video_info, self.comments_with_replies, self.total_replies)
+        if self._archive is not None:
+            self._archive.write(LINE_VIDEO, video_id=self.video_id, url=url, raw=video_details, record=video_info)
+            self._archive.write(LINE_TRANSCRIPT, video_id=self.video_id, raw=transcript, text=transcription)
+            self._archive.write(LINE_ENGAGEMENT, video_id=self.video_id, record=engagement)
+        self._close_files()
+
+        if self._archive is not None:
+            os.replace(self._path(f"{ARCHIVE_FILE}.tmp"), self._path(ARCHIVE_FILE))
+        if self._archive is not None or self._jsonl_file is not None:
+            self._write_header(video_info, transcription, transcript, engagement)
+        if 'csv' in self.formats:
+            save_video_csv(video_info, self.video_folder)
+        if self._txt_body is not None:
+            self._write_txt(video_info)
+        if 'transcription' in self.formats:
+            save_transcription(transcription, self.video_folder)
+        if self.dataset_store is not None:
+            self.dataset_store.append_record({
+                'metadata': self.metadata,
+                'video': video_info,
+                'comments': [],
+                'transcription': transcription,
+                'engagement': engagement,
+            })
+
+        print(f"✓ Dados salvos em: {self.video_folder}")
+        comments_file = ARCHIVE_FILE if self._archive is not None else self.COMMENTS_JSONL
+        print(f"  - {comments_file} ({self.total_comments} comentários, {self.total_replies} respostas)")
+
+    def _write_header(self, video_info: Dict, transcription: str, transcript: Optional[Dict],
+                      engagement: Dict) -> None:
+        comments_format = 'archive' if self._archive is not None else 'jsonl'
+        try:
+            json_data = {
+                '_metadata': {**self.metadata, 'comments_format': comments_format},
+                'video': video_info,
+                'transcription': build_transcription_block(video_info, transcription, transcript),
+                'comments_file': ARCHIVE_FILE if self._archive is not None else self.COMMENTS_JSONL,
+                'comment_total': self.total_comments,
+                'flag_counts': self.flag_counts,
+                'engagement': engagement,
+            }
+            with atomic_open(self._path("dados.json"), "w", encoding="utf-8") as f:
+                json.dump(json_data, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Erro ao salvar JSON: {e}")
+            raise
+
+    def _write_txt(self, video_info: Dict) -> None:
+        body_path = self._path(f"{self.TXT_FILE}.comentarios.tmp")
+        try:
+            with atomic_open(self._path(self.TXT_FILE), "w", encoding="utf-8") as f:
+                f.write("\n".join(txt_header_lines(video_info, self.total_comments)) + "\n")
+                with open(body_path, "r", encoding="utf-8") as body:
+                    shutil.copyfileobj(body, f)
+        except Exception as e:
+            print(f"Erro ao salvar TXT: {e}")
+            raise
+        finally:
+            os.remove(body_path)
+
+    def abort(self) -> None:
+        self._close_files()
+        if self.dataset_store is not None:
+            self.dataset_store.discard_video(self.video_id)
+        for filename in (f"{ARCHIVE_FILE}.tmp", f"{self.TXT_FILE}.comentarios.tmp"):
+            if os.path.exists(self._path(filename)):
+                os.remove(self._path(filename))
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .metrics import METRICS
+
+TRANSCRIPT_LANGUAGES = ["pt", "en"]
+DEFAULT_TRANSCRIPT_CACHE_DIR = os.path.join(".cache", "transcripts")
+# Legendas podem ser publicadas depois do vídeo: resultados negativos expiram
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600
+
+STATUS_OK = "ok"
+STATUS_UNAVAILABLE = "unavailable"
+STATUS_ERROR = "error"
+
+
+def empty_transcript(video_id: str, status: str) -> Dict:
+    return {
+        "video_id": video_id,
+        "status": status,
+        "fetched_at": time.time(),
+        "language": None,
+        "is_generated": None,
+        "start": [],
+        "duration": [],
+        "text": [],
+    }
+
+
+def fetch_transcript(video_id: str, languages: Optional[List[str]] = None) -> Dict:
+    # Importado sob demanda: carrega requests e só é necessário ao buscar transcrições
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+
+    try:
+        with METRICS.timer("transcript.fetch"):
+            fetched = YouTubeTranscriptApi().fetch(video_id, languages=languages or TRANSCRIPT_LANGUAGES)
+        snippets = getattr(fetched, "snippets", None) or []
+        if not snippets:
+            print("Nenhum snippet de transcrição encontrado")
+            return empty_transcript(video_id, STATUS_UNAVAILABLE)
+
+        transcript = empty_transcript(video_id, STATUS_OK)
+        transcript["language"] = getattr(fetched, "language_code", None)
+        transcript["is_generated"] = getattr(fetched, "is_generated", None)
+        transcript["start"] = [round(snippet.start, 3) for snippet in snippets]
+        transcript["duration"] = [round(snippet.duration, 3) for snippet in snippets]
+        transcript["text"] = [snippet.text for snippet in snippets]
+        return transcript
+
+    except (TranscriptsDisabled, NoTranscriptFound):
+        print("Transcrições desabilitadas ou não encontradas")
+        return empty_transcript(video_id, STATUS_UNAVAILABLE)
+    except Exception as e:
+        print(f"Erro ao buscar transcrição: {e}")
+        return empty_transcript(video_id, STATUS_ERROR)
+
+
+def transcript_text(transcript: Optional[Dict]) -> str:
+    if not transcript:
+        return ""
+    return " ".join(transcript.get("text", []))
+
+
+class TranscriptCache:
+
+    def __init__(self, folder: str = DEFAULT_TRANSCRIPT_CACHE_DIR, negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.folder = folder
+        self.negative_ttl = negative_ttl
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.folder, f"{video_id}.json")
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        path = self._path(video_id)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                transcript = json.load(f)
+        except Exception as e:
+            print(f"Erro ao ler transcrição em cache: {e}")
+            return None
+
+        if transcript["status"] != STATUS_OK and time.time() - transcript["fetched_at"] > self.negative_ttl:
+            return None
+        return transcript
+
+    def put(self, transcript: Dict) -> None:
+        # Erros transitórios (rede, bloqueio) não são guardados para permitir nova tentativa
+        if transcript["status"] == STATUS_ERROR:
+            return
+
+        path = self._path(transcript["video_id"])
+        tmp_file = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(transcript, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, path)
+        except Exception as e:
+            print(f"Erro ao salvar transcrição em cache: {e}")
+
+
+class TranscriptFetcher:
+
+    def __init__(self, max_workers: int = 2, cache: Optional[TranscriptCache] = None,
+                 languages: Optional[List[str]] = None):
+        self.cache = cache
+        self.languages = languages or TRANSCRIPT_LANGUAGES
+        self.cache_hits = 0
+        self.fetched = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcricao")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, video_id: str) -> Dict:
+        if self.cache is not None:
+            cached = self.cache.get(video_id)
+            if cached is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                METRICS.incr("transcript.cache_hits")
+                return cached
+
+        transcript = fetch_transcript(video_id, self.languages)
+        with self._lock:
+            self.fetched += 1
+        if self.cache is not None:
+            self.cache.put(transcript)
+        return transcript
+
+    def submit(self, video_id: str) -> Future:
+        with self._lock:
+            future = self._futures.get(video_id)
+            if future is None:
+                future = self._executor.submit(self._load, video_id)
+                self._futures[video_id] = future
+            return future
+
+    def get(self, video_id: str) -> Dict:
+        future = self.submit(video_id)
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                self._futures.pop(video_id, None)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,159 +1,531 @@
 from googleapiclient.errors import HttpError
-from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 import json
+import random
+import threading
 import time
 from dotenv import load_dotenv
 
+from .metrics import METRICS
+from .response_cache import ResponseCache
+from .transcripts import fetch_transcript, transcript_text
+from .quota import (
+    DEFAULT_DAILY_QUOTA,
+    QUOTA_EXCEEDED_REASONS,
+    RATE_LIMIT_REASONS,
+    KeyRotator,
+    QuotaLedger,
+    TokenBucket,
+    get_error_reason,
+    key_fingerprint,
+    quota_cost,
+)
+
 load_dotenv()
 
+MAX_IDS_PER_VIDEOS_REQUEST = 50
+# Cópia do documento de descoberta da YouTube Data API v3 (só os recursos usados): o cliente nunca busca na rede
+BUNDLED_DISCOVERY_DOCUMENT = os.path.join(os.path.dirname(__file__), "discovery_documents", "youtube.v3.json")
+VIDEO_PARTS = "contentDetails,id,snippet,statistics,status"
+
 
 class YoutubeApi:
 
     YOUTUBE_API_SERVICE_NAME = os.getenv("API_SERVICE_NAME")
     YOUTUBE_API_VERSION = os.getenv("API_VERSION")
     DEVELOPER_KEY = os.getenv("API_KEY_YOUTUBE")
+    DEVELOPER_KEYS = [k.strip() for k in os.getenv("API_KEYS_YOUTUBE", "").split(",") if k.strip()]
+    REQUESTS_PER_SECOND = float(os.getenv("API_REQUESTS_PER_SECOND", "10"))
+    DAILY_QUOTA = int(os.getenv("API_DAILY_QUOTA", str(DEFAULT_DAILY_QUOTA)))
+    QUOTA_STATE_FILE = os.getenv("QUOTA_STATE_FILE", ".quota_state.json")
+    CACHE_ENABLED = os.getenv("API_CACHE_ENABLED", "1") == "1"
+    CACHE_PATH = os.getenv("API_CACHE_PATH", os.path.join(".cache", "api_cache.sqlite"))
+    CACHE_MAX_MB = int(os.getenv("API_CACHE_MAX_MB", "512"))
+    API_ROOT_URL = os.getenv("API_ROOT_URL")
+    DISCOVERY_DOCUMENT = os.getenv("DISCOVERY_DOCUMENT")
+    MAX_RATE_LIMIT_RETRIES = 5
+    MAX_BACKOFF_SECONDS = 32
     static_YoutubeApi = None
+    _instance_lock = threading.Lock()
+    _discovery_documents = {}
+    _discovery_lock = threading.Lock()
 
     def __init__(self):
+        self._local = threading.local()
+        self.rate_limiter = TokenBucket(self.REQUESTS_PER_SECOND)
+        self.quota = QuotaLedger(self.QUOTA_STATE_FILE, self.DAILY_QUOTA)
+        self.keys = KeyRotator(self.DEVELOPER_KEYS or [self.DEVELOPER_KEY], self.quota)
+        self.cache = (
+            ResponseCache(self.CACHE_PATH, self.CACHE_MAX_MB * 1024 * 1024) if self.CACHE_ENABLED else None
+        )
+        self._client_for(self.keys.current() or self.DEVELOPER_KEY)
+        atexit.register(self.quota.save)
+
+    @classmethod
+    def _discovery_document(cls, path):
+        # Guarda o texto, não o dict: build_from_document altera o documento ao montar os métodos
+        with cls._discovery_lock:
+            if path not in cls._discovery_documents:
+                with open(path, "r", encoding="utf-8") as f:
+                    cls._discovery_documents[path] = f.read()
+            return cls._discovery_documents[path]
+
+    def _build_client(self, developer_key):
+        from googleapiclient.discovery import build, build_from_document
+
+        options = {"developerKey": developer_key}
+        if self.API_ROOT_URL:
+            # Permite apontar o cliente para um servidor local (ex.: benchmarks)
+            options["client_options"] = {"api_endpoint": self.API_ROOT_URL}
+
         try:
-            self.youtube = build(
+            document_path = self.DISCOVERY_DOCUMENT or BUNDLED_DISCOVERY_DOCUMENT
+            if os.path.exists(document_path):
+                return build_from_document(self._discovery_document(document_path), **options)
+
+            return build(
                 self.YOUTUBE_API_SERVICE_NAME,
                 self.YOUTUBE_API_VERSION,
-                developerKey=self.DEVELOPER_KEY,
+                static_discovery=True,
+                **options,
             )
         except Exception as e:
             print(f"Erro ao inicializar YouTube API: {e}")
             raise
 
+    def _client_for(self, developer_key):
+        # httplib2 não é thread-safe: cada thread usa seu próprio cliente por chave
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        if developer_key not in clients:
+            clients[developer_key] = self._build_client(developer_key)
+        return clients[developer_key]
+
+    @property
+    def youtube(self):
+        return self._client_for(self.keys.current() or self.DEVELOPER_KEY)
+
     @staticmethod
     def get_instance() -> "YoutubeApi":
         if YoutubeApi.static_YoutubeApi is None:
-            YoutubeApi.static_YoutubeApi = YoutubeApi()
+            with YoutubeApi._instance_lock:
+                if YoutubeApi.static_YoutubeApi is None:
+                    YoutubeApi.static_YoutubeApi = YoutubeApi()
         return YoutubeApi.static_YoutubeApi
 
-    def make_api_request(self, method_func, **kwargs):
-        max_retries = 3
+    def make_api_request(self, method_func, endpoint=None, **kwargs):
+        cost = quota_cost(endpoint)
         retry_count = 0
-        wait_time = 30
 
-        while retry_count < max_retries:
+        cache_key = None
+        cached = None
+        if self.cache is not None and endpoint:
+            cache_key = self.cache.make_key(endpoint, kwargs)
+            cached = self.cache.get(cache_key)
+            if cached is not None and cached.fresh:
+                METRICS.incr("api.cache_hits")
+                return cached.response
+
+        while True:
+            developer_key = self.keys.select(cost)
+            METRICS.incr("api.rate_limit_wait_seconds", self.rate_limiter.acquire())
+
+            started = time.perf_counter()
             try:
-                request = method_func(self.youtube, **kwargs)
-                return request.execute()
+                request = method_func(self._client_for(developer_key), **kwargs)
+                if cached is not None and cached.etag:
+                    request.headers["If-None-Match"] = cached.etag
+                response = request.execute()
+                self.record_call(endpoint, cost, started)
+                self.quota.spend(developer_key, cost)
+                if cache_key is not None:
+                    self.cache.put(cache_key, endpoint, response)
+                return response
 
             except HttpError as e:
-                if e.resp.status == 403:
+                self.record_call(endpoint, cost, started)
+                self.quota.spend(developer_key, cost)
+                status = e.resp.status
+                reason = get_error_reason(e)
+
+                if status == 304 and cached is not None:
+                    METRICS.incr("api.not_modified")
+                    self.cache.touch(cache_key)
+                    return cached.response
+
+                if status == 403 and reason in QUOTA_EXCEEDED_REASONS:
+                    METRICS.incr("api.quota_exhausted")
+                    if self.keys.mark_exhausted(developer_key):
+                        print(f"Cota diária esgotada na chave {key_fingerprint(developer_key)}")
+                    continue
+
+                if reason in RATE_LIMIT_REASONS or status == 429 or status >= 500:
                     retry_count += 1
-                    if retry_count < max_retries:
-                        print(
-                            f"Rate limit atingido. Aguardando {wait_time}s antes de tentar novamente ({retry_count}/{max_retries})..."
-                        )
-                        time.sleep(wait_time)
-                        wait_time *= 2
-                    else:
-                        print(f"Erro HTTP 403 após {max_retries} tentativas: {e}")
+                    if retry_count > self.MAX_RATE_LIMIT_RETRIES:
+                        print(f"Erro HTTP {status} após {retry_count - 1} tentativas: {e}")
                         raise
-                else:
-                    print(f"Erro HTTP na requisição API: {e}")
-                    raise
+
+                    wait_time = min(self.MAX_BACKOFF_SECONDS, 2 ** (retry_count - 1))
+                    wait_time += random.uniform(0, wait_time / 2)
+                    print(
+                        f"Rate limit atingido ({reason or status}). Aguardando {wait_time:.1f}s "
+                        f"antes de tentar novamente ({retry_count}/{self.MAX_RATE_LIMIT_RETRIES})..."
+                    )
+                    METRICS.incr("api.retries")
+                    METRICS.incr("api.backoff_seconds", wait_time)
+                    time.sleep(wait_time)
+                    continue
+
+                print(f"Erro HTTP na requisição API: {e}")
+                raise
 
             except Exception as e:
                 print(f"Erro inesperado na requisição API: {e}")
                 raise
 
-        raise Exception("Falha ao executar requisição após múltiplas tentativas")
 
+    @staticmethod
+    def record_call(endpoint, cost, started):
+        METRICS.observe(f"api.{endpoint or 'unknown'}", time.perf_counter() - started)
+        METRICS.incr("api.requests")
+        METRICS.incr("quota.units", cost)
+        METRICS.incr(f"quota.units.{endpoint or 'unknown'}", cost)
 
-def get_data_videos(video_id):
+
+def format_http_error(error):
     try:
-        api_youtube = YoutubeApi.get_instance()
-        method_func = lambda client, **kwargs: client.videos().list(**kwargs)
-        part = "contentDetails,id,snippet,statistics,status"
+        json_response = error.content if hasattr(error, "content") else None
+        dados_json = json.loads(json_response)
+        error_msg = f"Erro API {dados_json['error']['code']}"
+        print(error_msg)
+        return {"error": error_msg}
+    except Exception:
+        return {"error": str(error)}
 
-        video_response = api_youtube.make_api_request(method_func, id=video_id, part=part)
-        return video_response
 
-    except HttpError as error:
+def split_videos_response(video_response, video_ids):
+    items_by_id = {item.get("id"): item for item in video_response.get("items", [])}
+    envelope = {k: v for k, v in video_response.items() if k not in ("items", "pageInfo")}
+
+    split = {}
+    for video_id in video_ids:
+        items = [items_by_id[video_id]] if video_id in items_by_id else []
+        split[video_id] = {
+            **envelope,
+            "items": items,
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+        }
+    return split
+
+
+def get_data_videos_many(video_ids):
+    unique_ids = list(dict.fromkeys(video_ids))
+    results = {}
+
+    for start in range(0, len(unique_ids), MAX_IDS_PER_VIDEOS_REQUEST):
+        chunk = unique_ids[start:start + MAX_IDS_PER_VIDEOS_REQUEST]
         try:
-            json_response = error.content if hasattr(error, "content") else None
-            dados_json = json.loads(json_response)
-            error_msg = f"Erro API {dados_json['error']['code']}"
-            print(error_msg)
-            return {"error": error_msg}
-        except Exception:
-            return {"error": str(error)}
-    except Exception as e:
-        print(f"Erro ao buscar vídeo: {e}")
-        return {"error": str(e)}
+            api_youtube = YoutubeApi.get_instance()
+            method_func = lambda client, **kwargs: client.videos().list(**kwargs)
+
+            video_response = api_youtube.make_api_request(
+                method_func, endpoint="videos.list", id=",".join(chunk), part=VIDEO_PARTS
+            )
+            results.update(split_videos_response(video_response, chunk))
 
+        except HttpError as error:
+            error_result = format_http_error(error)
+            for video_id in chunk:
+                results[video_id] = dict(error_result)
+        except Exception as e:
+            print(f"Erro ao buscar vídeos: {e}")
+            for video_id in chunk:
+                results[video_id] = {"error": str(e)}
 
-def get_data_comments(video_id):
-    try:
-        api_youtube = YoutubeApi.get_instance()
-        comentarios_estruturados = []
-        next_page_token = None
-        page_count = 0
+    return results
 
-        while True:
-            page_count += 1
-            print(f"  Buscando comentários - página {page_count}...")
 
-            method_func = lambda client, **kwargs: client.commentThreads().list(**kwargs)
-            part = "snippet,replies"
+def statistics_from_item(item):
+    statistics = item.get("statistics", {})
+    return {
+        field: (int(statistics[key]) if key in statistics else None)
+        for field, key in (("view_count", "viewCount"), ("like_count", "likeCount"), ("comment_count", "commentCount"))
+    }
+
 
-            comments_response = api_youtube.make_api_request(
-                method_func, videoId=video_id, part=part, pageToken=next_page_token, maxResults=100
+def get_video_statistics_many(video_ids):
+    # Só a parte statistics: mesma cota de videos.list (1 unidade por 50 IDs) e respostas bem menores
+    unique_ids = list(dict.fromkeys(video_ids))
+    results = {}
+
+    for start in range(0, len(unique_ids), MAX_IDS_PER_VIDEOS_REQUEST):
+        chunk = unique_ids[start:start + MAX_IDS_PER_VIDEOS_REQUEST]
+        try:
+            api_youtube = YoutubeApi.get_instance()
+            method_func = lambda client, **kwargs: client.videos().list(**kwargs)
+
+            response = api_youtube.make_api_request(
+                method_func, endpoint="videos.statistics", id=",".join(chunk), part="statistics"
             )
+            for item in response.get("items", []):
+                results[item.get("id")] = statistics_from_item(item)
+
+        except HttpError as error:
+            error_result = format_http_error(error)
+            for video_id in chunk:
+                results[video_id] = dict(error_result)
+        except Exception as e:
+            print(f"Erro ao buscar estatísticas: {e}")
+            for video_id in chunk:
+                results[video_id] = {"error": str(e)}
+
+    return results
+
+
+def get_data_videos(video_id):
+    return get_data_videos_many([video_id])[video_id]
+
+
+class VideoBatchQueue:
 
-            if "items" in comments_response:
-                for thread in comments_response["items"]:
-                    comentario = {
-                        "comment": thread.get("snippet", {}).get("topLevelComment", {}),
-                        "replies": thread.get("replies", {}).get("comments", []),
-                    }
-                    comentarios_estruturados.append(comentario)
+    def __init__(self, max_batch_size=MAX_IDS_PER_VIDEOS_REQUEST, max_wait=0.05, fetch_many=None):
+        # fetch_many=get_video_statistics_many agrupa só estatísticas, sem cache
+        self.fetch_many = fetch_many or get_data_videos_many
+        self.max_batch_size = min(max_batch_size, MAX_IDS_PER_VIDEOS_REQUEST)
+        self.max_wait = max_wait
+        self.requests_made = 0
+        self._cond = threading.Condition()
+        self._pending = []
+        self._in_flight = set()
+        self._results = {}
+        self._waiters = {}
+        self._discarded = set()
 
-            next_page_token = comments_response.get("nextPageToken")
-            if not next_page_token:
+    def add(self, video_id):
+        with self._cond:
+            if video_id in self._results or video_id in self._in_flight or video_id in self._pending:
+                return
+            self._pending.append(video_id)
+            full = len(self._pending) >= self.max_batch_size
+
+        if full:
+            self.flush()
+
+    def discard(self, video_id):
+        # Vídeo que não será buscado: sai do próximo lote e o resultado, se já chegou, não fica retido
+        with self._cond:
+            if self._waiters.get(video_id):
+                return
+            if video_id in self._pending:
+                self._pending.remove(video_id)
+            self._results.pop(video_id, None)
+            if video_id in self._in_flight:
+                self._discarded.add(video_id)
+
+    def add_many(self, video_ids):
+        for video_id in video_ids:
+            self.add(video_id)
+
+    def flush(self):
+        with self._cond:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:len(batch)]
+            self._in_flight.update(batch)
+
+        if not batch:
+            return
+
+        results = {}
+        try:
+            results = self.fetch_many(batch)
+        finally:
+            with self._cond:
+                self.requests_made += 1
+                for video_id in batch:
+                    if video_id in self._discarded:
+                        self._discarded.discard(video_id)
+                        if not self._waiters.get(video_id):
+                            continue
+                    self._results[video_id] = results.get(
+                        video_id, {"error": "Vídeo não retornado pelo lote"}
+                    )
+                self._in_flight.difference_update(batch)
+                self._cond.notify_all()
+
+    def get(self, video_id):
+        with self._cond:
+            self._waiters[video_id] = self._waiters.get(video_id, 0) + 1
+        self.add(video_id)
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._cond:
+                if video_id in self._results:
+                    return self._take_result(video_id)
+
+                remaining = deadline - time.monotonic()
+                if remaining > 0 or video_id not in self._pending:
+                    self._cond.wait(timeout=remaining if remaining > 0 else None)
+                    continue
+
+            self.flush()
+
+    def _take_result(self, video_id):
+        self._waiters[video_id] -= 1
+        if self._waiters[video_id] > 0:
+            return self._results[video_id]
+
+        del self._waiters[video_id]
+        return self._results.pop(video_id)
+
+
+def thread_from_item(thread):
+    return {
+        "comment": thread.get("snippet", {}).get("topLevelComment", {}),
+        "replies": thread.get("replies", {}).get("comments", []),
+        "total_reply_count": thread.get("snippet", {}).get("totalReplyCount", 0),
+    }
+
+
+def iter_comment_pages(video_id, order=None, page_token=None):
+    api_youtube = YoutubeApi.get_instance()
+    method_func = lambda client, **kwargs: client.commentThreads().list(**kwargs)
+    part = "snippet,replies"
+    # Em ordem cronológica o começo da lista muda a cada comentário novo: sempre revalidado por ETag
+    endpoint = "commentThreads.latest" if order == "time" else "commentThreads.list"
+    page_count = 0
+
+    while True:
+        page_count += 1
+        print(f"  Buscando comentários - página {page_count}...")
+
+        comments_response = api_youtube.make_api_request(
+            method_func,
+            endpoint=endpoint,
+            videoId=video_id,
+            part=part,
+            pageToken=page_token,
+            maxResults=100,
+            order=order,
+        )
+
+        threads = [thread_from_item(thread) for thread in comments_response.get("items", [])]
+        page_token = comments_response.get("nextPageToken")
+        yield threads, page_token
+
+        if not page_token:
+            break
+
+
+def is_known_thread(thread, known_comment_ids, since=None):
+    comment = thread.get("comment", {})
+    if comment.get("id") in known_comment_ids:
+        return True
+
+    published_at = comment.get("snippet", {}).get("publishedAt", "")
+    return bool(since and published_at and published_at < since)
+
+
+def get_data_comments(video_id, known_comment_ids=None, since=None, page_token=None, on_page=None):
+    incremental = bool(known_comment_ids) or bool(since)
+    known_comment_ids = known_comment_ids or set()
+
+    try:
+        comentarios_estruturados = []
+        order = "time" if incremental else None
+
+        for threads, next_page_token in iter_comment_pages(video_id, order=order, page_token=page_token):
+            reached_known = False
+            page_threads = []
+            for thread in threads:
+                if incremental and is_known_thread(thread, known_comment_ids, since):
+                    reached_known = True
+                    break
+                page_threads.append(thread)
+            comentarios_estruturados.extend(page_threads)
+
+            if on_page is not None:
+                on_page(page_threads, None if reached_known else next_page_token)
+
+            if reached_known:
+                print("  Comentários já coletados alcançados, interrompendo paginação")
                 break
 
         print(f"  Total de comentários coletados: {len(comentarios_estruturados)}")
         return comentarios_estruturados
 
     except HttpError as error:
-        try:
-            json_response = error.content if hasattr(error, "content") else None
-            dados_json = json.loads(json_response)
-            error_msg = f"Erro API {dados_json['error']['code']}"
-            print(error_msg)
-            return {"error": error_msg}
-        except Exception:
-            return {"error": str(error)}
+        return format_http_error(error)
     except Exception as e:
         print(f"Erro ao buscar comentários: {e}")
         return {"error": str(e)}
 
 
-def get_transcription(video_id):
-    try:
-        ytt_api = YouTubeTranscriptApi().fetch(video_id, languages=["pt", "en"])
+def get_all_replies(parent_id):
+    api_youtube = YoutubeApi.get_instance()
+    method_func = lambda client, **kwargs: client.comments().list(**kwargs)
+    replies = []
+    calls = 0
+    page_token = None
 
-        if not hasattr(ytt_api, "snippets") or not ytt_api.snippets:
-            print("Nenhum snippet de transcrição encontrado")
-            return ""
+    while True:
+        calls += 1
+        replies_response = api_youtube.make_api_request(
+            method_func,
+            endpoint="comments.list",
+            parentId=parent_id,
+            part="snippet",
+            pageToken=page_token,
+            maxResults=100,
+        )
+        replies.extend(replies_response.get("items", []))
 
-        transcription = " ".join([snippet.text for snippet in ytt_api.snippets])
+        page_token = replies_response.get("nextPageToken")
+        if not page_token:
+            return replies, calls
 
-        print(f"Transcrição obtida: {len(ytt_api.snippets)} snippets, {len(transcription)} caracteres")
 
-        return transcription
+def expand_replies(comments_data, max_workers=4):
+    truncated = [
+        thread for thread in comments_data
+        if thread.get("total_reply_count", 0) > len(thread.get("replies", []))
+    ]
+    if not truncated:
+        return 0
 
-    except (TranscriptsDisabled, NoTranscriptFound):
-        print("Transcrições desabilitadas ou não encontradas")
-        return ""
-    except Exception as e:
-        print(f"Erro ao buscar transcrição: {e}")
-        return ""
\ No newline at end of file
+    print(f"  Expandindo respostas de {len(truncated)} comentários...")
+    extra_calls = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="respostas") as executor:
+        futures = {
+            executor.submit(get_all_replies, thread["comment"].get("id")): thread
+            for thread in truncated
+        }
+        for future in as_completed(futures):
+            thread = futures[future]
+            try:
+                replies, calls = future.result()
+            except HttpError as error:
+                format_http_error(error)
+                extra_calls += 1
+                continue
+            except Exception as e:
+                print(f"Erro ao expandir respostas: {e}")
+                continue
+
+            extra_calls += calls
+            if len(replies) > len(thread["replies"]):
+                thread["replies"] = replies
+
+    return extra_calls
+
+
+def get_transcription(video_id):
+    transcript = fetch_transcript(video_id)
+    transcription = transcript_text(transcript)
+    if transcription:
+        print(f"Transcrição obtida: {len(transcript['text'])} snippets, {len(transcription)} caracteres")
+    return transcription